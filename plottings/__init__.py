@@ -2,11 +2,22 @@
 A library to generate Matplotilib graphics within django applications
 """
 
+__version__ = "0.0.4"
+
 from .views import (
         PNGPlotView,
         SVGZPlotView,
         CachedPNGPlotView,
         CachedSVGZPlotView,
+        SVGPlotView,
+        CachedSVGPlotView,
+        ImagePlotView,
+        CachedImagePlotView,
+        PlotLinkView,
+        AsyncPNGPlotView,
+        AsyncSVGZPlotView,
+        AsyncCachedPNGPlotView,
+        AsyncCachedSVGZPlotView,
         PNGViewPlot,
         SVGViewPlot,
         )
@@ -15,6 +26,7 @@ from .value import (
         PNGBase64PlotToValue,
         CachedSVGPlotToValue,
         CachedPNGBase64PlotToValue,
+        LazyPlotValue,
         SVGValuePlot,
         PNGValuePlot,
         )
@@ -24,17 +36,28 @@ from .file import (
         SVGFilePlot,
         PNGFilePlot,
         )
+from . import metrics  # noqa: F401
 
 __all__ = ["PNGPlotView",
            "SVGZPlotView",
            "PNGPlotToFile",
            "SVGZPlotToFile",
            "SVGPlotToValue",
-           "PNGBase64PlotToValue"
+           "PNGBase64PlotToValue",
            "CachedPNGPlotView",
            "CachedSVGZPlotView",
+           "SVGPlotView",
+           "CachedSVGPlotView",
+           "ImagePlotView",
+           "CachedImagePlotView",
+           "PlotLinkView",
            "CachedSVGPlotToValue",
-           "PNGBase64PlotToValue"
+           "LazyPlotValue",
+           "CachedPNGBase64PlotToValue",
+           "AsyncPNGPlotView",
+           "AsyncSVGZPlotView",
+           "AsyncCachedPNGPlotView",
+           "AsyncCachedSVGZPlotView",
            "PNGViewPlot",
            "SVGViewPlot",
            "PNGFilePlot",
@@ -42,5 +65,3 @@ __all__ = ["PNGPlotView",
            "PNGValuePlot",
            "SVGValuePlot",
            ]
-
-__version__ = "0.0.4"
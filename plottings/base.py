@@ -12,11 +12,98 @@
     .. _mixin: https://en.wikipedia.org/wiki/Mixin
 """
 
+import copy
+import math
+import time
+import asyncio
+import random
+import logging
 from typing import Any
-from io import BytesIO, StringIO
+from io import BytesIO, StringIO, SEEK_END
+from hashlib import blake2b
+from functools import partial
 from contextlib import contextmanager
+from concurrent.futures.process import BrokenProcessPool
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image
+from asgiref.sync import sync_to_async
 from django.core.cache import caches
+from django.db import connections
+from django.utils.http import quote_etag
+from .executors import (
+        discard_broken_executor,
+        get_refresh_executor,
+        get_render_executor,
+        )
+from .cache import (
+        ENVELOPE_VERSION,
+        get_local_cache,
+        pack_image,
+        unpack_image,
+        )
+from .hashing import fingerprint
+from .processing import minify_svg, optimize_png, optimize_png_file
+from .signals import plot_cache_lookup, plot_rendered
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def plotting_figure(plotter_function, data, options, figure_options=None):
+    """
+    Context manager that calls the plotter function and closes the returned
+    figure on exit.
+
+    When ``figure_options`` is not ``None`` the plotter function receives a
+    ``figure`` argument with a new ``Figure`` attached to an Agg canvas built
+    with these options. These figures are not registered in pyplot, so there
+    is no need to close them and they can be safely drawn in many threads.
+    """
+    if figure_options is None:
+        figure = plotter_function(data, **options)
+        try:
+            yield figure
+        finally:
+            plt.close(figure)
+    else:
+        figure = Figure(**figure_options)
+        FigureCanvasAgg(figure)
+        result = plotter_function(data, figure=figure, **options)
+        yield figure if result is None else result
+
+
+def render_image(buffer_class, plotter_function, data, plot_options,
+                 save_options, figure_options=None, processor=None):
+    """
+    Renders the figure in a new ``buffer_class`` object and returns its value,
+    passed through ``processor`` when it is given. This function is the job
+    sent to the render executor so all its arguments must be picklable, that
+    is why ``plotter_function`` has to be a statically linked function.
+    """
+    image_buffer = buffer_class()
+    with plotting_figure(plotter_function, data, plot_options,
+                         figure_options) as figure:
+        figure.savefig(image_buffer, **save_options)
+    if processor is None:
+        return image_buffer.getvalue()
+    return processor(image_buffer.getvalue())
+
+
+def get_buffer_size(buffer):
+    """
+    Returns the size in bytes of the content of an in memory file, text
+    buffers are measured encoded in UTF-8. Unlike ``getbuffer()`` it never
+    copies the content of binary buffers, what happens when the buffer shares
+    its value with a ``bytes`` object.
+    """
+    if isinstance(buffer, StringIO):
+        return len(buffer.getvalue().encode("utf-8"))
+    position = buffer.tell()
+    size = buffer.seek(0, SEEK_END)
+    buffer.seek(position)
+    return size
 
 
 class BasePlot:
@@ -27,6 +114,7 @@ class BasePlot:
     """
     buffer_class: Any = BytesIO
     file_format = ""
+    use_pyplot = True
 
     @staticmethod
     def plotter_function(data, **options):
@@ -35,6 +123,10 @@ class BasePlot:
         returns a Matplotlib figure to be lately used to render the plot
         in given file formats.
 
+        When the class attribute ``use_pyplot`` is ``False`` the function
+        receives an extra ``figure`` argument with a ``Figure`` object, not
+        managed by pyplot, where it has to draw the plot.
+
         :data: A data structure that contains the information to be graphically
             modeled by the plotter function.
 
@@ -46,10 +138,53 @@ class BasePlot:
     def get_plot_data(self):
         """
         Override this method to provide data to ``plotter_function()``
-        method.
+        method. It is called at most once per instance.
         """
         return []
 
+    def _get_plot_data(self):
+        try:
+            return self._plot_data
+        except AttributeError:
+            start = time.perf_counter()
+            self._plot_data = self.get_plot_data()
+            self._record_timing("data", time.perf_counter() - start)
+            return self._plot_data
+
+    async def aget_plot_data(self):
+        """
+        Override this method with a coroutine that provides the data, using
+        the async ORM, when the plot is used from async views. By default it
+        calls ``get_plot_data()`` in a thread.
+        """
+        return await sync_to_async(self.get_plot_data)()
+
+    async def _aget_plot_data(self):
+        try:
+            return self._plot_data
+        except AttributeError:
+            start = time.perf_counter()
+            self._plot_data = await self.aget_plot_data()
+            self._record_timing("data", time.perf_counter() - start)
+            return self._plot_data
+
+    def _record_timing(self, stage, seconds):
+        try:
+            timings = self._timings
+        except AttributeError:
+            timings = self._timings = {}
+        timings[stage] = timings.get(stage, 0) + seconds
+
+    def get_timings(self):
+        """
+        Returns a dict with the seconds spent by this instance in every stage
+        of the building of the plot: ``cache`` for the cache lookup, ``data``
+        for ``get_plot_data()``, ``plot`` for the plotter function, ``save``
+        for ``savefig()``, ``render`` for both of them in worker processes
+        and ``process`` for ``process_image()``.
+        """
+        return dict(getattr(self, "_timings", {}))
+
     def get_plot_options(self):
         """
         Override this method to provide the plotter function with extra
@@ -64,6 +199,19 @@ class BasePlot:
         """
         return {}
 
+    def get_figure_options(self):
+        """
+        Override this method to provide the arguments used to build the
+        ``Figure`` object passed to the plotter function when ``use_pyplot``
+        is ``False``.
+        """
+        return {}
+
+    def _get_figure_options(self):
+        if self.use_pyplot:
+            return None
+        return self.get_figure_options()
+
     def get_filetype(self):
         """
         Override this method to dinamically set the file format of the
@@ -71,15 +219,61 @@ class BasePlot:
         """
         return self.file_format
 
+    def get_render_format(self):
+        """
+        Returns the format the figure is saved in, by default the file type.
+        Override it when ``process_image()`` converts the image to the file
+        type.
+        """
+        return self.get_filetype()
+
     @contextmanager
     def _get_figure(self):
-        data = self.get_plot_data()
+        data = self._get_plot_data()
         plot_options = self.get_plot_options()
-        figure = self.plotter_function(data, **plot_options)
-        try:
+        figure_options = self._get_figure_options()
+        start = time.perf_counter()
+        with plotting_figure(self.plotter_function, data, plot_options,
+                             figure_options) as figure:
+            self._record_timing("plot", time.perf_counter() - start)
             yield figure
-        finally:
-            plt.close(figure)
+
+    def get_render_executor(self):
+        """
+        Override this method to provide an executor where the plot is rendered.
+        By default returns the process pool configured with the
+        ``PLOTTINGS_RENDER_PROCESSES`` setting or ``None`` to render the plot
+        inline.
+        """
+        return get_render_executor()
+
+    def _render_in_executor(self, executor, save_options):
+        arguments = (self.buffer_class,
+                     self.plotter_function,
+                     self._get_plot_data(),
+                     self.get_plot_options(),
+                     save_options,
+                     self._get_figure_options(),
+                     self.get_render_processor())
+        try:
+            value = executor.submit(render_image, *arguments).result()
+        except BrokenProcessPool:
+            # A worker died and the pool refuses new renders, it is replaced
+            # and the plot rendered once more in the new one.
+            logger.warning("Replacing the broken render pool")
+            discard_broken_executor(executor)
+            executor = self.get_render_executor()
+            value = executor.submit(render_image, *arguments).result()
+        return self.buffer_class(value)
+
+    def get_render_processor(self):
+        """
+        Override this method to return a picklable function that transforms
+        the value of the image in the render executor, so costly encodings
+        are not run in the process serving the request. ``process_image()``
+        is still called afterwards.
+        """
+        return None
 
     def process_image(self, image_buffer):
         """
@@ -92,53 +286,542 @@ class BasePlot:
         """
         Returns a in memory file object with the plot image.
         """
-        image_buffer = self.buffer_class()
         options = self.get_save_options()
-        options["format"] = self.get_filetype()
-        with self._get_figure() as figure:
-            figure.savefig(image_buffer, **options)
+        options["format"] = self.get_render_format()
+        executor = self.get_render_executor()
+        if executor is None:
+            image_buffer = self.buffer_class()
+            with self._get_figure() as figure:
+                start = time.perf_counter()
+                figure.savefig(image_buffer, **options)
+                self._record_timing("save", time.perf_counter() - start)
+        else:
+            self._get_plot_data()
+            start = time.perf_counter()
+            image_buffer = self._render_in_executor(executor, options)
+            self._record_timing("render", time.perf_counter() - start)
+        start = time.perf_counter()
         image_buffer = self.process_image(image_buffer)
+        self._record_timing("process", time.perf_counter() - start)
         image_buffer.seek(0)
+        plot_rendered.send(sender=type(self), plot=self,
+                           timings=self.get_timings(),
+                           size=get_buffer_size(image_buffer),
+                           format=self.get_filetype())
         return image_buffer
 
+    def _can_render_in_thread(self):
+        return not self.use_pyplot or self.get_render_executor() is not None
+
+    async def aget_image(self):
+        """
+        Async version of ``get_image()``. The data is loaded with
+        ``aget_plot_data()`` and the plot is rendered in a thread, or in the
+        render executor, so the event loop is not blocked. Plots that use
+        pyplot without a render executor are rendered one at a time in the
+        thread shared by the ``thread_sensitive`` sync code, because pyplot is
+        not thread safe.
+        """
+        await self._aget_plot_data()
+        render = sync_to_async(
+                self.get_image,
+                thread_sensitive=not self._can_render_in_thread())
+        return await render()
+
 
 class CachedMixin:
     """
     Mixin class to add cache functionality to the BasePlot object.
+
+    Only one request at a time renders a missing plot, the rest of them wait
+    up to ``cache_lock_wait`` seconds for the image to be cached before
+    rendering it by themselves. Setting ``cache_early_refresh`` to a positive
+    value enables the probabilistic early refresh of the entries before they
+    expire, higher values refresh earlier.
+
+    When ``cache_soft_timeout`` is set, entries older than that number of
+    seconds are still served but a background thread renders them again,
+    ``cache_timeout`` keeps being the time after which the entries are no
+    longer served.
+
+    Images are stored in an envelope together with their metadata, see the
+    ``cache`` module, entries written by other versions of the library are
+    ignored.
+
+    The ``aget_image()`` coroutine follows the same protocol using the async
+    cache API.
+
+    The ``cache_hit`` attribute tells whether the last call to
+    ``get_image()`` found the image in the cache.
+
+    Setting ``local_cache`` to ``True`` keeps the most requested images in the
+    memory of the process too, when the ``PLOTTINGS_LOCAL_CACHE_SIZE`` setting
+    is set. Use it for plots that are the same for all users.
     """
     cache_backend_name = "default"
     cache_timeout = -1
+    cache_lock_timeout = 30
+    cache_lock_wait = 5
+    cache_lock_interval = 0.05
+    cache_early_refresh = 0
+    cache_soft_timeout = None
+    local_cache = False
 
     def get_cache_key(self):
         """
         Override this method with a value that changes when plot regeneration
-        is required.
+        is required. By default it is a fingerprint of the plot class, so
+        classes with different post-processing don't share images, the
+        plotter function, the render format, the save and plot options and the
+        value returned by ``get_data_fingerprint()`` or the plot data if it is
+        ``None``. It raises ``TypeError`` when they can't be fingerprinted,
+        see the ``hashing`` module.
+        """
+        try:
+            return self._cache_key
+        except AttributeError:
+            pass
+        plotter = self.plotter_function
+        plotter_name = getattr(plotter, "__qualname__", repr(plotter))
+        digest = fingerprint(ENVELOPE_VERSION,
+                             type(self),
+                             getattr(plotter, "__module__", ""),
+                             plotter_name,
+                             self.get_render_format(),
+                             self.get_save_options(),
+                             self.get_plot_options(),
+                             self._get_data_fingerprint())
+        self._cache_key = f"plottings:{digest}"
+        return self._cache_key
+
+    @classmethod
+    def get_cache_warm_arguments(cls):
+        """
+        Override this class method to return an iterable of ``(args,
+        kwargs)`` pairs, each of them builds an instance of the class whose
+        image is rendered by the ``warm_plot_cache`` command. View classes
+        get them as the URL arguments.
+        """
+        return []
+
+    def get_data_fingerprint(self):
+        """
+        Override this method to return a cheap value that changes whenever the
+        plot data changes, such as the count and the latest modification date
+        of the rows it is built from. When it is not ``None`` the plot data is
+        only loaded if the image has to be rendered.
+        """
+        return None
+
+    async def aget_data_fingerprint(self):
+        """
+        Async version of ``get_data_fingerprint()``, override it with a
+        coroutine that uses the async ORM. By default an overridden
+        ``get_data_fingerprint()`` is called in a thread.
+        """
+        if type(self).get_data_fingerprint is \
+                CachedMixin.get_data_fingerprint:
+            return None
+        return await sync_to_async(self.get_data_fingerprint)()
+
+    def _get_data_fingerprint(self):
+        try:
+            data_fingerprint = self._data_fingerprint
+        except AttributeError:
+            data_fingerprint = self.get_data_fingerprint()
+            self._data_fingerprint = data_fingerprint
+        if data_fingerprint is None:
+            return ("data", self._get_plot_data())
+        return ("fingerprint", data_fingerprint)
+
+    async def aget_cache_key(self):
+        """
+        Async version of ``get_cache_key()``. It loads the data fingerprint,
+        or the plot data when there is none, before computing the key in the
+        event loop. Override it if your ``get_cache_key()`` does queries.
         """
-        raise NotImplementedError
+        if not hasattr(self, "_data_fingerprint"):
+            self._data_fingerprint = await self.aget_data_fingerprint()
+        if self._data_fingerprint is None:
+            await self._aget_plot_data()
+        return self.get_cache_key()
+
+    def _get_key_etag(self, cache_key):
+        cache_key = str(cache_key).encode("utf-8")
+        return quote_etag(blake2b(cache_key, digest_size=16).hexdigest())
+
+    def _is_content_key(self, cache_key):
+        # Keys built from the default get_cache_key() change with the data,
+        # keys of overridden methods that don't extend it may not.
+        default_key = self.__dict__.get("_cache_key")
+        return default_key is not None and \
+            str(cache_key).startswith(default_key)
+
+    def _get_etag(self, cache_key, metadata):
+        if metadata is not None and "hash" in metadata:
+            return quote_etag(metadata["hash"])
+        if self._is_content_key(cache_key):
+            return self._get_key_etag(cache_key)
+        return None
+
+    def get_etag(self):
+        """
+        Returns the content hash of the cached image as ETag. When the plot is
+        not cached it is derived from the cache key, so it can be known
+        without rendering the plot, unless ``get_cache_key()`` is overridden
+        with a key that isn't built from the default one, then it is ``None``
+        and views hash the rendered image.
+        """
+        cache_key = self.get_cache_key()
+        result = self._peek_lookup_result(cache_key)
+        if result is None:
+            metadata = self.get_image_metadata()
+        else:
+            metadata = result[1]
+        return self._get_etag(cache_key, metadata)
+
+    async def aget_etag(self):
+        """
+        Async version of ``get_etag()``.
+        """
+        cache_key = await self.aget_cache_key()
+        result = self._peek_lookup_result(cache_key)
+        if result is None:
+            metadata = await self.aget_image_metadata()
+        else:
+            metadata = result[1]
+        return self._get_etag(cache_key, metadata)
+
+    def _get_cache_timeout(self, cache_backend):
+        if self.cache_timeout == -1:
+            return cache_backend.default_timeout
+        return self.cache_timeout
+
+    def _set_cache_value(self, cache_backend, cache_key, value):
+        if self.cache_timeout == -1:
+            cache_backend.set(cache_key, value)
+        else:
+            cache_backend.set(cache_key, value, self.cache_timeout)
+
+    def _get_local_cache(self):
+        if not self.local_cache:
+            return None
+        return get_local_cache(self.cache_backend_name)
+
+    def _read_local_cache(self, cache_key):
+        local_cache = self._get_local_cache()
+        if local_cache is None:
+            return None, None
+        return unpack_image(local_cache.get(cache_key))
+
+    def _write_local_cache(self, cache_backend, cache_key, envelope):
+        local_cache = self._get_local_cache()
+        if local_cache is not None:
+            local_cache.set(cache_key, envelope,
+                            self._get_cache_timeout(cache_backend))
+
+    def _read_cache(self, cache_backend, cache_key):
+        image_value, metadata = self._read_local_cache(cache_key)
+        if image_value is not None:
+            return image_value, metadata
+        envelope = cache_backend.get(cache_key)
+        image_value, metadata = unpack_image(envelope)
+        if image_value is not None:
+            self._write_local_cache(cache_backend, cache_key, envelope)
+        return image_value, metadata
+
+    async def _aread_cache(self, cache_backend, cache_key):
+        image_value, metadata = self._read_local_cache(cache_key)
+        if image_value is not None:
+            return image_value, metadata
+        envelope = await cache_backend.aget(cache_key)
+        image_value, metadata = unpack_image(envelope)
+        if image_value is not None:
+            self._write_local_cache(cache_backend, cache_key, envelope)
+        return image_value, metadata
+
+    def _record_lookup(self, cache_key, image_value, start):
+        duration = time.perf_counter() - start
+        self._record_timing("cache", duration)
+        self.cache_hit = image_value is not None
+        plot_cache_lookup.send(sender=type(self), plot=self, key=cache_key,
+                               hit=self.cache_hit, duration=duration)
+
+    def _write_cache(self, cache_backend, cache_key, envelope):
+        self._set_cache_value(cache_backend, cache_key, envelope)
+        self._write_local_cache(cache_backend, cache_key, envelope)
+
+    async def _awrite_cache(self, cache_backend, cache_key, envelope):
+        if self.cache_timeout == -1:
+            await cache_backend.aset(cache_key, envelope)
+        else:
+            await cache_backend.aset(cache_key, envelope, self.cache_timeout)
+        self._write_local_cache(cache_backend, cache_key, envelope)
+
+    def _is_stale(self, metadata):
+        if self.cache_soft_timeout is None or metadata is None:
+            return False
+        return time.time() >= metadata["created"] + self.cache_soft_timeout
+
+    def _needs_early_refresh(self, cache_backend, metadata):
+        if not self.cache_early_refresh:
+            return False
+        timeout = self._get_cache_timeout(cache_backend)
+        if timeout is None or metadata is None:
+            return False
+        gap = -metadata["delta"] * self.cache_early_refresh * \
+            math.log(1 - random.random())
+        return time.time() + gap >= metadata["created"] + timeout
+
+    def _refresh_cache(self, cache_key, lock_key):
+        cache_backend = caches[self.cache_backend_name]
+        try:
+            self._render_to_cache(cache_backend, cache_key)
+        except Exception:
+            logger.exception("Error refreshing cached plot %s", cache_key)
+        finally:
+            cache_backend.delete(lock_key)
+            connections.close_all()
+
+    def _get_refresh_plot(self):
+        # The refresh renders a copy, so its timings don't mix with the ones
+        # of the request that is served the stale image.
+        plot = copy.copy(self)
+        plot.__dict__.pop("_timings", None)
+        return plot
+
+    def _schedule_refresh(self, cache_backend, cache_key):
+        lock_key = f"{cache_key}:lock"
+        if cache_backend.add(lock_key, 1, self.cache_lock_timeout):
+            get_refresh_executor().submit(
+                    self._get_refresh_plot()._refresh_cache, cache_key,
+                    lock_key)
+
+    async def _aschedule_refresh(self, cache_backend, cache_key):
+        lock_key = f"{cache_key}:lock"
+        if await cache_backend.aadd(lock_key, 1, self.cache_lock_timeout):
+            get_refresh_executor().submit(
+                    self._get_refresh_plot()._refresh_cache, cache_key,
+                    lock_key)
+
+    def _wait_for_value(self, cache_backend, cache_key):
+        deadline = time.monotonic() + self.cache_lock_wait
+        while time.monotonic() < deadline:
+            time.sleep(self.cache_lock_interval)
+            image_value, metadata = self._read_cache(cache_backend,
+                                                     cache_key)
+            if image_value is not None:
+                self._image_entry = (cache_key, image_value, metadata)
+                return image_value
+        return None
+
+    async def _await_for_value(self, cache_backend, cache_key):
+        deadline = time.monotonic() + self.cache_lock_wait
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.cache_lock_interval)
+            image_value, metadata = await self._aread_cache(cache_backend,
+                                                            cache_key)
+            if image_value is not None:
+                self._image_entry = (cache_key, image_value, metadata)
+                return image_value
+        return None
+
+    def _render_envelope(self):
+        created = time.time()
+        start = time.perf_counter()
+        image_file = super().get_image()
+        delta = time.perf_counter() - start
+        envelope = pack_image(image_file.getvalue(),
+                              created=created,
+                              delta=delta,
+                              format=self.get_filetype())
+        return image_file, envelope
+
+    def _render_to_cache(self, cache_backend, cache_key):
+        image_file, envelope = self._render_envelope()
+        self._write_cache(cache_backend, cache_key, envelope)
+        self._image_entry = (cache_key, *unpack_image(envelope))
+        return image_file
+
+    async def _arender_to_cache(self, cache_backend, cache_key):
+        await self._aget_plot_data()
+        render = sync_to_async(
+                self._render_envelope,
+                thread_sensitive=not self._can_render_in_thread())
+        image_file, envelope = await render()
+        await self._awrite_cache(cache_backend, cache_key, envelope)
+        self._image_entry = (cache_key, *unpack_image(envelope))
+        return image_file
+
+    def store_image(self, cache_key, image_value, **metadata):
+        """
+        Stores an image value under ``cache_key``, it is used to cache images
+        rendered out of ``get_image()``, like other variants of the same plot.
+        While the plot is warmed by the ``registry`` module the envelopes are
+        collected instead, so they are stored by the calling process.
+        """
+        metadata.setdefault("created", time.time())
+        metadata.setdefault("delta", 0)
+        metadata.setdefault("format", self.get_filetype())
+        envelope = pack_image(image_value, **metadata)
+        stored_images = getattr(self, "_stored_images", None)
+        if stored_images is not None:
+            stored_images[cache_key] = envelope
+            return
+        cache_backend = caches[self.cache_backend_name]
+        self._write_cache(cache_backend, cache_key, envelope)
+
+    def get_image_metadata(self):
+        """
+        Returns a dict with the ``created`` timestamp, the render ``delta``
+        in seconds, the ``size`` in bytes, the content ``hash`` and the
+        ``format`` of the cached image, or ``None`` when the plot is not
+        cached.
+        """
+        cache_backend = caches[self.cache_backend_name]
+        cache_key = self.get_cache_key()
+        image_value, metadata = self._read_cache_timed(cache_backend,
+                                                       cache_key)
+        self._lookup_result = (cache_key, image_value, metadata)
+        return metadata
+
+    async def aget_image_metadata(self):
+        """
+        Async version of ``get_image_metadata()``.
+        """
+        cache_backend = caches[self.cache_backend_name]
+        cache_key = await self.aget_cache_key()
+        image_value, metadata = await self._aread_cache_timed(cache_backend,
+                                                              cache_key)
+        self._lookup_result = (cache_key, image_value, metadata)
+        return metadata
+
+    def _take_lookup_result(self, cache_key):
+        # The entry read by get_image_metadata() in the same request, so
+        # views don't read it twice.
+        result = self.__dict__.pop("_lookup_result", None)
+        if result is not None and result[0] == cache_key:
+            return result[1:]
+        return None
+
+    def _peek_lookup_result(self, cache_key):
+        # The entry read by get_image_metadata() or the one rendered or
+        # waited for by get_image(), so get_etag() doesn't read it again.
+        for name in ("_lookup_result", "_image_entry"):
+            result = self.__dict__.get(name)
+            if result is not None and result[0] == cache_key:
+                return result[1:]
+        return None
+
+    def _read_cache_timed(self, cache_backend, cache_key):
+        start = time.perf_counter()
+        image_value, metadata = self._read_cache(cache_backend, cache_key)
+        self._record_lookup(cache_key, image_value, start)
+        return image_value, metadata
+
+    async def _aread_cache_timed(self, cache_backend, cache_key):
+        start = time.perf_counter()
+        image_value, metadata = await self._aread_cache(cache_backend,
+                                                        cache_key)
+        self._record_lookup(cache_key, image_value, start)
+        return image_value, metadata
+
+    def _lookup_cache(self, cache_backend, cache_key):
+        result = self._take_lookup_result(cache_key)
+        if result is None:
+            result = self._read_cache_timed(cache_backend, cache_key)
+        return result
+
+    async def _alookup_cache(self, cache_backend, cache_key):
+        result = self._take_lookup_result(cache_key)
+        if result is None:
+            result = await self._aread_cache_timed(cache_backend, cache_key)
+        return result
 
     def get_image(self):
         cache_backend = caches[self.cache_backend_name]
         cache_key = self.get_cache_key()
-        image_value = cache_backend.get(cache_key)
+        image_value, metadata = self._lookup_cache(cache_backend, cache_key)
+
+        if image_value is not None:
+            if self._is_stale(metadata):
+                # Pyplot is not thread safe, these plots are refreshed inline.
+                if self._can_render_in_thread():
+                    self._schedule_refresh(cache_backend, cache_key)
+                    return self.buffer_class(image_value)
+            elif not self._needs_early_refresh(cache_backend, metadata):
+                return self.buffer_class(image_value)
+
+        lock_key = f"{cache_key}:lock"
+        if cache_backend.add(lock_key, 1, self.cache_lock_timeout):
+            try:
+                return self._render_to_cache(cache_backend, cache_key)
+            finally:
+                cache_backend.delete(lock_key)
 
         if image_value is None:
-            image_file = super().get_image()
-            image_value = image_file.getvalue()
-            if self.cache_timeout == -1:
-                cache_backend.set(cache_key, image_value)
-            else:
-                cache_backend.set(cache_key, image_value, self.cache_timeout)
-            return image_file
-        else:
-            return self.buffer_class(image_value)
+            image_value = self._wait_for_value(cache_backend, cache_key)
+        if image_value is None:
+            return self._render_to_cache(cache_backend, cache_key)
+        return self.buffer_class(image_value)
+
+    async def aget_image(self):
+        cache_backend = caches[self.cache_backend_name]
+        cache_key = await self.aget_cache_key()
+        image_value, metadata = await self._alookup_cache(cache_backend,
+                                                          cache_key)
+
+        if image_value is not None:
+            if self._is_stale(metadata):
+                if self._can_render_in_thread():
+                    await self._aschedule_refresh(cache_backend, cache_key)
+                    return self.buffer_class(image_value)
+            elif not self._needs_early_refresh(cache_backend, metadata):
+                return self.buffer_class(image_value)
+
+        lock_key = f"{cache_key}:lock"
+        if await cache_backend.aadd(lock_key, 1, self.cache_lock_timeout):
+            try:
+                return await self._arender_to_cache(cache_backend, cache_key)
+            finally:
+                await cache_backend.adelete(lock_key)
+
+        if image_value is None:
+            image_value = await self._await_for_value(cache_backend,
+                                                      cache_key)
+        if image_value is None:
+            return await self._arender_to_cache(cache_backend, cache_key)
+        return self.buffer_class(image_value)
 
 
 class SVGPlotMixin(BasePlot):
     """
     Mixing to generate a memory file containing an SVG figure.
+
+    Setting ``svg_minify`` to ``True`` minifies the document before it is
+    processed and cached, see ``processing.minify_svg()``, with coordinates
+    rounded to ``svg_precision`` decimals and without metadata if
+    ``svg_strip_metadata`` is ``True``.
     """
     buffer_class = StringIO
     file_format = "svg"
+    svg_minify = False
+    svg_precision = 3
+    svg_strip_metadata = True
+
+    def process_image(self, image_buffer):
+        if self.svg_minify:
+            value = image_buffer.getvalue()
+            binary = isinstance(value, bytes)
+            if binary:
+                value = value.decode("utf-8")
+            value = minify_svg(value,
+                               precision=self.svg_precision,
+                               strip_metadata=self.svg_strip_metadata)
+            if binary:
+                value = value.encode("utf-8")
+            image_buffer = self.buffer_class(value)
+        return super().process_image(image_buffer)
 
 
 class SVGZPlotMixin(BasePlot):
@@ -152,6 +835,52 @@ class SVGZPlotMixin(BasePlot):
 class PNGPlotMixin(BasePlot):
     """
     Mixin to generate a memory file containing a binary PNG figure.
+
+    Setting ``png_optimize`` to ``True`` optimizes the image before it is
+    processed and cached, see ``processing.optimize_png()``: the alpha
+    channel is dropped when it is opaque, figures with up to
+    ``png_max_colors`` colors are stored with a palette, the file is
+    compressed with ``png_compress_level`` and the text chunks are stripped
+    if ``png_strip_metadata`` is ``True``. This is lossless unless
+    ``png_quantize_colors`` is raised above ``png_max_colors``, then figures
+    with up to that many colors are quantized. When a render executor is used
+    the image is optimized in the worker process.
     """
     buffer_class = BytesIO
     file_format = "png"
+    png_optimize = False
+    png_max_colors = 256
+    png_quantize_colors = 0
+    png_compress_level = 9
+    png_strip_metadata = True
+
+    def get_png_options(self):
+        """
+        Returns the arguments of ``processing.optimize_png()``.
+        """
+        return {"max_colors": self.png_max_colors,
+                "quantize_colors": self.png_quantize_colors,
+                "compress_level": self.png_compress_level,
+                "strip_metadata": self.png_strip_metadata,
+                }
+
+    def encode_png(self, image):
+        """
+        Returns the Pillow ``image`` encoded as an optimized PNG file.
+        """
+        return optimize_png(image, **self.get_png_options())
+
+    def _optimizes_png(self):
+        return self.png_optimize and self.get_render_format() == "png"
+
+    def get_render_processor(self):
+        if self._optimizes_png():
+            return partial(optimize_png_file, **self.get_png_options())
+        return super().get_render_processor()
+
+    def process_image(self, image_buffer):
+        if self._optimizes_png() and self.get_render_executor() is None:
+            image_buffer.seek(0)
+            with Image.open(image_buffer) as image:
+                image_buffer = self.buffer_class(self.encode_png(image))
+        return super().process_image(image_buffer)
@@ -0,0 +1,160 @@
+"""
+    ========
+    batch.py
+    ========
+
+    This module renders many plots in one call, like the ones of a dashboard
+    page. The cached images are looked up with a single ``get_many()`` call
+    per cache backend, the missing ones are rendered in parallel and written
+    back with ``set_many()``.
+
+    Plots are rendered in a pool of threads when they don't use pyplot, see
+    ``BasePlot.use_pyplot``, or when they are rendered in the process pool,
+    see the ``executors`` module. The rest are rendered one after the other
+    in the calling thread while the pool works.
+"""
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from django.core.cache import caches
+from django.db import connections
+from .base import CachedMixin
+from .cache import unpack_image
+
+
+def _render(plot, locked):
+    if locked:
+        return plot._render_envelope()
+    return plot.get_image(), None
+
+
+def _render_in_thread(plot, locked):
+    try:
+        return _render(plot, locked)
+    finally:
+        connections.close_all()
+
+
+def _read_caches(plots, cache_keys, images):
+    missing = defaultdict(list)
+    for index, cache_key in cache_keys.items():
+        plot = plots[index]
+        image_value, metadata = plot._read_local_cache(cache_key)
+        if image_value is None:
+            missing[plot.cache_backend_name].append(index)
+        else:
+            images[index] = plot.buffer_class(image_value)
+
+    for backend_name, indexes in missing.items():
+        cache_backend = caches[backend_name]
+        envelopes = cache_backend.get_many({cache_keys[index]
+                                            for index in indexes})
+        for index in indexes:
+            plot, cache_key = plots[index], cache_keys[index]
+            envelope = envelopes.get(cache_key)
+            image_value, metadata = unpack_image(envelope)
+            if image_value is None:
+                continue
+            plot._write_local_cache(cache_backend, cache_key, envelope)
+            if plot._is_stale(metadata):
+                plot._schedule_refresh(cache_backend, cache_key)
+            elif plot._needs_early_refresh(cache_backend, metadata):
+                continue
+            images[index] = plot.buffer_class(image_value)
+
+
+def _write_caches(plots, cache_keys, envelopes):
+    values = defaultdict(dict)
+    for index, envelope in envelopes.items():
+        plot = plots[index]
+        cache_backend = caches[plot.cache_backend_name]
+        plot._write_local_cache(cache_backend, cache_keys[index], envelope)
+        values[plot.cache_backend_name, plot.cache_timeout][
+                cache_keys[index]] = envelope
+    for (backend_name, timeout), data in values.items():
+        if timeout == -1:
+            caches[backend_name].set_many(data)
+        else:
+            caches[backend_name].set_many(data, timeout)
+
+
+def get_images(plots, max_workers=None):
+    """
+    Returns a list with the in memory file objects of the images of
+    ``plots``, in the same order. Cached plots are looked up together and
+    only the misses are rendered, each of them once even when many plots
+    share the same cache key. ``max_workers`` is the size of the pool of
+    threads, by default the one chosen by ``ThreadPoolExecutor``.
+    """
+    plots = list(plots)
+    images = [None] * len(plots)
+    cache_keys = {index: plot.get_cache_key()
+                  for index, plot in enumerate(plots)
+                  if isinstance(plot, CachedMixin)}
+    _read_caches(plots, cache_keys, images)
+
+    first_indexes = {}
+    duplicates = {}
+    for index, image in enumerate(images):
+        if image is not None:
+            continue
+        if index in cache_keys:
+            key = (plots[index].cache_backend_name, cache_keys[index])
+            first_index = first_indexes.setdefault(key, index)
+            if first_index != index:
+                duplicates[index] = first_index
+        else:
+            first_indexes[index] = index
+
+    locks = defaultdict(list)
+    locked = set()
+    for index in first_indexes.values():
+        if index not in cache_keys:
+            continue
+        plot = plots[index]
+        lock_key = f"{cache_keys[index]}:lock"
+        cache_backend = caches[plot.cache_backend_name]
+        if cache_backend.add(lock_key, 1, plot.cache_lock_timeout):
+            locks[plot.cache_backend_name].append(lock_key)
+            locked.add(index)
+
+    envelopes = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {index: executor.submit(_render_in_thread,
+                                              plots[index],
+                                              index in locked)
+                       for index in first_indexes.values()
+                       if plots[index]._can_render_in_thread()}
+            for index in first_indexes.values():
+                if index not in futures:
+                    images[index], envelope = _render(plots[index],
+                                                      index in locked)
+                    if envelope is not None:
+                        envelopes[index] = envelope
+            for index, future in futures.items():
+                images[index], envelope = future.result()
+                if envelope is not None:
+                    envelopes[index] = envelope
+        _write_caches(plots, cache_keys, envelopes)
+    finally:
+        for backend_name, lock_keys in locks.items():
+            caches[backend_name].delete_many(lock_keys)
+
+    for index, first_index in duplicates.items():
+        images[index] = plots[index].buffer_class(
+                images[first_index].getvalue())
+    return images
+
+
+def get_values(plots, max_workers=None):
+    """
+    Returns a list with the values of ``plots``, instances of the **Value**
+    classes, in the same order. Their images are obtained with
+    ``get_images()`` and the values are kept in the plots, so outputting
+    them later doesn't render them again.
+    """
+    plots = list(plots)
+    images = get_images(plots, max_workers=max_workers)
+    for plot, image in zip(plots, images):
+        plot._value = plot.format_value(image)
+    return [plot._value for plot in plots]
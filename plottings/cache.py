@@ -0,0 +1,167 @@
+"""
+    ========
+    cache.py
+    ========
+
+    This module defines the envelope used to store the rendered images in the
+    Django cache. Images are stored together with a header of metadata that
+    describes them, so the image can be described without rendering it, and a
+    version that invalidates the entries written by other versions of the
+    library.
+
+    It also implements an optional in process LRU cache that keeps the most
+    requested envelopes in memory in front of the Django cache backend. Its
+    size in bytes is set with the ``PLOTTINGS_LOCAL_CACHE_SIZE`` setting and
+    the maximum number of seconds an entry is kept with
+    ``PLOTTINGS_LOCAL_CACHE_TIMEOUT``.
+"""
+import time
+import threading
+from collections import OrderedDict
+from hashlib import blake2b
+from django.conf import settings
+from django.core.signals import setting_changed
+from . import __version__
+
+ENVELOPE_FORMAT = 1
+ENVELOPE_VERSION = f"{ENVELOPE_FORMAT}:{__version__}"
+
+
+def get_content_hash(value):
+    """
+    Returns the hexadecimal hash of an image value.
+    """
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    return blake2b(value, digest_size=16).hexdigest()
+
+
+def pack_image(value, **metadata):
+    """
+    Returns the envelope that stores the image ``value`` in the cache. The
+    ``size`` in bytes and the content ``hash`` are added to the given
+    metadata.
+    """
+    if isinstance(value, str):
+        metadata["size"] = len(value.encode("utf-8"))
+    else:
+        metadata["size"] = len(value)
+    metadata["hash"] = get_content_hash(value)
+    return (ENVELOPE_VERSION, metadata, value)
+
+
+def unpack_image(envelope):
+    """
+    Returns a tuple with the image value and its metadata dict stored in the
+    envelope, or ``(None, None)`` if there is no envelope or it was written by
+    another version of the library.
+    """
+    if not isinstance(envelope, tuple) or len(envelope) != 3 or \
+            envelope[0] != ENVELOPE_VERSION:
+        return None, None
+    return envelope[2], envelope[1]
+
+
+class LocalCache:
+    """
+    A thread safe LRU cache of envelopes bounded by the size in bytes of the
+    images it stores. It counts its hits and misses.
+    """
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remove(self, key):
+        expires, size, envelope = self._entries.pop(key)
+        self.size -= size
+
+    def get(self, key):
+        """
+        Returns the envelope stored with ``key`` or ``None`` if it is missing
+        or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key, envelope, timeout=None):
+        """
+        Stores the envelope for ``timeout`` seconds, never longer than the
+        timeout of the cache, evicting the least recently used entries to make
+        room for it.
+        """
+        size = envelope[1]["size"]
+        if timeout is None or timeout > self.timeout:
+            timeout = self.timeout
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_size or timeout <= 0:
+                return
+            while self.size + size > self.max_size:
+                self._remove(next(iter(self._entries)))
+            self._entries[key] = (time.monotonic() + timeout, size, envelope)
+            self.size += size
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        """
+        Returns a dict with the number of ``entries``, their ``size`` and the
+        ``hits`` and ``misses`` counters.
+        """
+        with self._lock:
+            return {"entries": len(self._entries),
+                    "size": self.size,
+                    "hits": self.hits,
+                    "misses": self.misses}
+
+
+_local_caches = {}
+_local_caches_lock = threading.Lock()
+
+
+def get_local_cache(name):
+    """
+    Returns the local cache placed in front of the Django cache backend
+    ``name`` or ``None`` if the ``PLOTTINGS_LOCAL_CACHE_SIZE`` setting is not
+    set.
+    """
+    max_size = getattr(settings, "PLOTTINGS_LOCAL_CACHE_SIZE", 0)
+    if not max_size:
+        return None
+    with _local_caches_lock:
+        if name not in _local_caches:
+            timeout = getattr(settings, "PLOTTINGS_LOCAL_CACHE_TIMEOUT", 60)
+            _local_caches[name] = LocalCache(max_size, timeout)
+        return _local_caches[name]
+
+
+def _reset_local_caches(setting, **kwargs):
+    if setting.startswith("PLOTTINGS_LOCAL_CACHE"):
+        with _local_caches_lock:
+            _local_caches.clear()
+
+
+setting_changed.connect(_reset_local_caches)
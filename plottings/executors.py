@@ -0,0 +1,145 @@
+"""
+    ============
+    executors.py
+    ============
+
+    This module manages the pool of worker processes that can be used to
+    render the plots outside of the thread that is serving the request. The
+    pool is disabled by default and it is enabled by setting the number of
+    processes in the ``PLOTTINGS_RENDER_PROCESSES`` setting.
+
+    It also provides the pool of threads used to refresh the cached plots in
+    background and the pool of processes that run the jobs of the ``jobs``
+    module.
+"""
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections
+
+_render_executor = None
+_render_executor_lock = threading.Lock()
+_refresh_executor = None
+_job_executor = None
+_inherited_connections = []
+
+
+def initialize_worker():
+    """
+    Prepares a worker process importing Matplotlib with the Agg backend so
+    the first plot it renders doesn't have to pay for it.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot  # noqa: F401
+
+
+def initialize_job_worker():
+    """
+    Prepares a job worker process. The database connections inherited from
+    the parent process are detached, and kept referenced so they are never
+    closed from the child, so the worker opens its own ones.
+    """
+    initialize_worker()
+    for connection in connections.all():
+        if connection.connection is not None:
+            _inherited_connections.append(connection.connection)
+            connection.connection = None
+
+
+def get_render_executor():
+    """
+    Returns the process pool used to render the plots or ``None`` when the
+    ``PLOTTINGS_RENDER_PROCESSES`` setting is not set and the plots have to be
+    rendered inline.
+    """
+    global _render_executor
+    processes = getattr(settings, "PLOTTINGS_RENDER_PROCESSES", 0)
+    if not processes:
+        return None
+    with _render_executor_lock:
+        if _render_executor is None:
+            _render_executor = ProcessPoolExecutor(
+                    max_workers=processes,
+                    initializer=initialize_worker,
+                    )
+        return _render_executor
+
+
+def get_refresh_executor():
+    """
+    Returns the pool of threads used to refresh stale cache entries in
+    background. Its size is set by the ``PLOTTINGS_REFRESH_THREADS`` setting
+    and defaults to two threads.
+    """
+    global _refresh_executor
+    with _render_executor_lock:
+        if _refresh_executor is None:
+            threads = getattr(settings, "PLOTTINGS_REFRESH_THREADS", 2)
+            _refresh_executor = ThreadPoolExecutor(
+                    max_workers=threads,
+                    thread_name_prefix="plottings-refresh",
+                    )
+        return _refresh_executor
+
+
+def get_job_executor():
+    """
+    Returns the pool of processes that run the file jobs. Its size is set by
+    the ``PLOTTINGS_JOB_PROCESSES`` setting and defaults to two processes.
+    """
+    global _job_executor
+    with _render_executor_lock:
+        if _job_executor is None:
+            processes = getattr(settings, "PLOTTINGS_JOB_PROCESSES", 2)
+            _job_executor = ProcessPoolExecutor(
+                    max_workers=processes,
+                    initializer=initialize_job_worker,
+                    )
+        return _job_executor
+
+
+def shutdown_render_executor(wait=True):
+    """
+    Stops the worker processes of the render pool. A new pool is created the
+    next time ``get_render_executor()`` is called.
+    """
+    global _render_executor
+    with _render_executor_lock:
+        executor, _render_executor = _render_executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+def discard_broken_executor(executor):
+    """
+    Drops ``executor``, a pool of processes broken by the death of one of
+    its workers, so a new pool is created the next time it is requested.
+    """
+    global _render_executor, _job_executor
+    with _render_executor_lock:
+        if executor is _render_executor:
+            _render_executor = None
+        elif executor is _job_executor:
+            _job_executor = None
+    executor.shutdown(wait=False)
+
+
+def _reset_render_executor(setting, **kwargs):
+    global _refresh_executor, _job_executor
+    if setting == "PLOTTINGS_RENDER_PROCESSES":
+        shutdown_render_executor()
+    elif setting == "PLOTTINGS_REFRESH_THREADS":
+        with _render_executor_lock:
+            executor, _refresh_executor = _refresh_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+    elif setting == "PLOTTINGS_JOB_PROCESSES":
+        with _render_executor_lock:
+            executor, _job_executor = _job_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+setting_changed.connect(_reset_render_executor)
@@ -7,7 +7,9 @@
     be stored in media directories.
 """
 
+import posixpath
 from django.core.files import File as DjangoFile
+from django.core.files.storage import default_storage
 from .base import BasePlot, SVGZPlotMixin, PNGPlotMixin
 
 
@@ -18,6 +20,8 @@ class FileMixin:
     """
     file_class = DjangoFile
     filename = ""
+    storage = None
+    upload_to = ""
 
     def get_filename(self):
         """
@@ -37,6 +41,23 @@ class FileMixin:
         file = self.file_class(self.get_image(), name)
         return file
 
+    def get_storage(self):
+        """
+        Override this method to return the storage where ``save_file()``
+        stores the plot, by default the ``storage`` attribute or the default
+        storage of the project.
+        """
+        return self.storage or default_storage
+
+    def save_file(self):
+        """
+        Stores the file returned by ``get_file()`` in the ``upload_to``
+        directory of the storage and returns its name.
+        """
+        file = self.get_file()
+        name = posixpath.join(self.upload_to, file.name)
+        return self.get_storage().save(name, file)
+
 
 class SVGZPlotToFile(SVGZPlotMixin, FileMixin, BasePlot):
     """
@@ -0,0 +1,111 @@
+"""
+    ==========
+    hashing.py
+    ==========
+
+    This module computes fingerprints of the values used to build plots, so
+    they can be used as cache keys. Every value is hashed together with its
+    type, containers are walked recursively and there are fast paths for NumPy
+    arrays, that are hashed from their raw buffer without copying them, and
+    pandas objects. Django querysets are evaluated and hashed as lists and
+    model instances by their field values. Functions and classes are hashed
+    by their dotted path and other values by their ``repr()``, values that
+    only have the default ``repr()``, which includes their memory address,
+    raise ``TypeError``.
+"""
+import sys
+import types
+from hashlib import blake2b
+import numpy as np
+
+
+def _update_array(hasher, array):
+    hasher.update(f"ndarray:{array.dtype.str}:{array.shape}:".encode())
+    if array.dtype.hasobject:
+        _update(hasher, array.tolist())
+    else:
+        array = np.ascontiguousarray(array)
+        hasher.update(array.reshape(-1).view(np.uint8))
+
+
+def _update_pandas(hasher, pd, value):
+    if isinstance(value, pd.DataFrame):
+        _update(hasher, list(value.columns))
+        _update(hasher, [str(dtype) for dtype in value.dtypes])
+    else:
+        _update(hasher, (value.name, str(value.dtype)))
+    hashes = pd.util.hash_pandas_object(value, index=True)
+    _update_array(hasher, hashes.to_numpy())
+
+
+def _update_django(hasher, models, value):
+    if isinstance(value, models.QuerySet):
+        _update(hasher, list(value))
+        return True
+    if isinstance(value, models.Model):
+        options = value._meta
+        _update(hasher, [options.label] +
+                [getattr(value, field.attname)
+                 for field in options.concrete_fields])
+        return True
+    return False
+
+
+def _update(hasher, value):
+    hasher.update(type(value).__name__.encode())
+    if value is None or isinstance(value, (bool, int, float, complex)):
+        hasher.update(repr(value).encode())
+    elif isinstance(value, str):
+        hasher.update(f"{len(value)}:".encode())
+        hasher.update(value.encode("utf-8", "surrogatepass"))
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        hasher.update(f"{len(value)}:".encode())
+        hasher.update(value)
+    elif isinstance(value, np.ndarray):
+        _update_array(hasher, value)
+    elif isinstance(value, np.generic):
+        _update_array(hasher, np.asarray(value))
+    elif isinstance(value, (list, tuple)):
+        hasher.update(f"{len(value)}:".encode())
+        for item in value:
+            _update(hasher, item)
+    elif isinstance(value, dict):
+        items = sorted(((fingerprint(key), item)
+                        for key, item in value.items()),
+                       key=lambda pair: pair[0])
+        hasher.update(f"{len(items)}:".encode())
+        for key, item in items:
+            hasher.update(key.encode())
+            _update(hasher, item)
+    elif isinstance(value, (set, frozenset)):
+        hasher.update(f"{len(value)}:".encode())
+        for item in sorted(fingerprint(item) for item in value):
+            hasher.update(item.encode())
+    elif isinstance(value, (type, types.FunctionType,
+                            types.BuiltinFunctionType)):
+        hasher.update(f"{value.__module__}.{value.__qualname__}".encode())
+    else:
+        pd = sys.modules.get("pandas")
+        models = sys.modules.get("django.db.models")
+        if pd is not None and isinstance(value, (pd.DataFrame, pd.Series,
+                                                 pd.Index)):
+            _update_pandas(hasher, pd, value)
+        elif models is not None and _update_django(hasher, models, value):
+            pass
+        elif type(value).__repr__ is object.__repr__:
+            raise TypeError(
+                    f"Cannot fingerprint {type(value).__qualname__} objects, "
+                    "override get_data_fingerprint() or get_cache_key() in "
+                    "the plot class")
+        else:
+            hasher.update(repr(value).encode())
+
+
+def fingerprint(*values):
+    """
+    Returns an hexadecimal digest that identifies the given values.
+    """
+    hasher = blake2b(digest_size=20)
+    for value in values:
+        _update(hasher, value)
+    return hasher.hexdigest()
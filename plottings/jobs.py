@@ -0,0 +1,185 @@
+"""
+    =======
+    jobs.py
+    =======
+
+    This module renders **File** plots in background. A job is made of the
+    dotted path of a plot class, that has to include ``FileMixin``, and the
+    arguments used to build it, the plot is rendered and stored with
+    ``save_file()`` by a job backend while the request returns straight away.
+
+    The status of the jobs is kept in the cache set by the
+    ``PLOTTINGS_JOB_CACHE`` setting, ``"default"`` if not set, for
+    ``PLOTTINGS_JOB_TIMEOUT`` seconds, one day by default.
+
+    The backend is set with the ``PLOTTINGS_JOB_BACKEND`` setting, by default
+    ``ProcessJobBackend`` that runs the jobs in a local pool of processes.
+    Task queues can be used writing a backend whose ``submit()`` method sends
+    a task that calls ``execute_job()``, in that case the cache must be shared
+    by the web and the worker processes.
+"""
+import uuid
+import logging
+from functools import partial
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.utils.module_loading import import_string
+from .executors import discard_broken_executor, get_job_executor
+from .file import FileMixin
+from .links import get_plot_path
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def _get_cache():
+    return caches[getattr(settings, "PLOTTINGS_JOB_CACHE", "default")]
+
+
+def _get_job_key(job_id):
+    return f"plottings:job:{job_id}"
+
+
+def set_job_status(job_id, status, **fields):
+    """
+    Stores the ``status`` of a job together with other ``fields``, like the
+    ``name`` of the stored file or the ``error`` of a failed job.
+    """
+    timeout = getattr(settings, "PLOTTINGS_JOB_TIMEOUT", 24 * 60 * 60)
+    _get_cache().set(_get_job_key(job_id), dict(fields, status=status),
+                     timeout)
+
+
+def get_job_status(job_id):
+    """
+    Returns a dict with the ``status`` of a job, ``"pending"``,
+    ``"running"``, ``"done"`` or ``"failed"``, the ``name`` of the stored
+    file when it is done and the ``error`` when it failed. It returns
+    ``None`` for unknown or expired jobs.
+    """
+    return _get_cache().get(_get_job_key(job_id))
+
+
+def run_job(path, args, kwargs):
+    """
+    Builds the plot and saves its file, returning its name in the storage.
+    """
+    plot_class = import_string(path)
+    if not isinstance(plot_class, type) or \
+            not issubclass(plot_class, FileMixin):
+        raise ValueError(f"{path} is not a file plot class")
+    return plot_class(*args, **kwargs).save_file()
+
+
+def _run_job_in_worker(path, args, kwargs):
+    try:
+        return run_job(path, args, kwargs)
+    finally:
+        connections.close_all()
+
+
+def execute_job(job_id, path, args, kwargs):
+    """
+    Runs a job recording its status. Call it from the tasks of task queue
+    backends.
+    """
+    set_job_status(job_id, RUNNING)
+    try:
+        name = run_job(path, args, kwargs)
+    except Exception as error:
+        logger.exception("Error running plot job %s", job_id)
+        set_job_status(job_id, FAILED, error=str(error))
+        raise
+    set_job_status(job_id, DONE, name=name)
+    return name
+
+
+class JobBackend:
+    """
+    Base class of the job backends.
+    """
+
+    def submit(self, job_id, path, args, kwargs):
+        """
+        Override this method to run ``execute_job()`` with the given
+        arguments out of the request.
+        """
+        raise NotImplementedError("Job backends require a submit method")
+
+
+class ProcessJobBackend(JobBackend):
+    """
+    Runs the jobs in the pool of processes of the
+    ``executors.get_job_executor()`` function. The status is recorded from
+    the web process, so any cache backend can be used.
+    """
+
+    def _record_result(self, job_id, executor, future):
+        error = future.exception()
+        if error is None:
+            set_job_status(job_id, DONE, name=future.result())
+        else:
+            logger.error("Error running plot job %s", job_id,
+                         exc_info=error)
+            set_job_status(job_id, FAILED, error=str(error))
+            if isinstance(error, BrokenProcessPool):
+                discard_broken_executor(executor)
+
+    def submit(self, job_id, path, args, kwargs):
+        executor = get_job_executor()
+        try:
+            future = executor.submit(_run_job_in_worker, path, args, kwargs)
+        except BrokenProcessPool:
+            # A worker died and the pool refuses new jobs, it is replaced.
+            discard_broken_executor(executor)
+            executor = get_job_executor()
+            future = executor.submit(_run_job_in_worker, path, args, kwargs)
+        future.add_done_callback(partial(self._record_result, job_id,
+                                         executor))
+
+
+class ImmediateJobBackend(JobBackend):
+    """
+    Runs the jobs straight away in the calling thread, it is meant to be used
+    in tests and development.
+    """
+
+    def submit(self, job_id, path, args, kwargs):
+        try:
+            execute_job(job_id, path, args, kwargs)
+        except Exception:
+            pass
+
+
+def get_job_backend():
+    """
+    Returns an instance of the backend set by the ``PLOTTINGS_JOB_BACKEND``
+    setting.
+    """
+    path = getattr(settings, "PLOTTINGS_JOB_BACKEND",
+                   "plottings.jobs.ProcessJobBackend")
+    return import_string(path)()
+
+
+def enqueue(plot_class, *args, **kwargs):
+    """
+    Queues a job that builds a plot calling ``plot_class``, a class or its
+    dotted path, with the given arguments and saves its file. The arguments
+    must be picklable, or serializable by the task queue. Returns the id of
+    the job.
+    """
+    job_id = uuid.uuid4().hex
+    set_job_status(job_id, PENDING)
+    try:
+        get_job_backend().submit(job_id, get_plot_path(plot_class), args,
+                                 kwargs)
+    except Exception as error:
+        set_job_status(job_id, FAILED, error=str(error))
+        raise
+    return job_id
@@ -0,0 +1,92 @@
+"""
+    ========
+    links.py
+    ========
+
+    This module builds the URLs of plots served by ``PlotLinkView``, so
+    templates can include plots with an ``<img>`` tag instead of inlining
+    their content. The URL carries a signed token with the dotted path of the
+    plot class and the arguments used to build it, which have to be JSON
+    serializable, so the plot is only rendered when the browser requests it.
+
+    Include ``plottings.urls`` in your URL configuration to serve them.
+"""
+from django.core import signing
+from django.urls import reverse
+from django.utils.module_loading import import_string
+from django.views import View
+from .base import BasePlot
+
+SALT = "plottings.links"
+
+
+def get_plot_path(plot_class):
+    """
+    Returns the dotted path of ``plot_class``, it is also accepted as a
+    string.
+    """
+    if isinstance(plot_class, str):
+        return plot_class
+    return f"{plot_class.__module__}.{plot_class.__qualname__}"
+
+
+def get_plot_token(plot_class, *args, **kwargs):
+    """
+    Returns the signed token of a plot built calling ``plot_class`` with the
+    given arguments.
+    """
+    return signing.dumps([get_plot_path(plot_class), args, kwargs],
+                         salt=SALT, compress=True)
+
+
+def load_plot_token(token, max_age=None):
+    """
+    Returns the plot instance built from a token made by
+    ``get_plot_token()``. It raises ``django.core.signing.BadSignature`` when
+    the token is not valid or it is older than ``max_age`` seconds and
+    ``ValueError`` when the class is not a plot class that can be built
+    outside of a request.
+    """
+    path, args, kwargs = signing.loads(token, salt=SALT, max_age=max_age)
+    plot_class = import_string(path)
+    if not isinstance(plot_class, type) or \
+            not issubclass(plot_class, BasePlot) or \
+            issubclass(plot_class, View):
+        raise ValueError(f"{path} is not a plot class")
+    return plot_class(*args, **kwargs)
+
+
+def get_plot_url(plot_class, *args, **kwargs):
+    """
+    Returns the URL of the image of a plot built calling ``plot_class`` with
+    the given arguments.
+    """
+    token = get_plot_token(plot_class, *args, **kwargs)
+    return reverse("plottings:plot", kwargs={"token": token})
+
+
+class PlotURL:
+    """
+    Template value that outputs the URL of the image of a plot built calling
+    ``plot_class`` with the given arguments. The URL is built the first time
+    it is output.
+    """
+
+    def __init__(self, plot_class, *args, **kwargs):
+        self.plot_class = plot_class
+        self.args = args
+        self.kwargs = kwargs
+
+    def get_url(self):
+        try:
+            return self._url
+        except AttributeError:
+            self._url = get_plot_url(self.plot_class, *self.args,
+                                     **self.kwargs)
+            return self._url
+
+    def __str__(self):
+        return self.get_url()
+
+    def __bool__(self):
+        return True
@@ -0,0 +1,108 @@
+"""
+    ==================
+    warm_plot_cache.py
+    ==================
+
+    Management command that renders in advance the images of the registered
+    plot classes, see the ``registry`` module, and stores them in the cache.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from plottings.executors import initialize_job_worker
+from plottings.registry import (
+        get_registered_plots,
+        warm_plot,
+        warm_plot_in_worker,
+        )
+
+
+class Command(BaseCommand):
+    help = "Renders the registered plots and stores them in the cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+                "plots", nargs="*", metavar="plot",
+                help="Dotted paths of the plot classes to warm, all the "
+                     "registered ones by default.")
+        parser.add_argument(
+                "--processes", type=int, default=os.cpu_count() or 1,
+                help="Number of worker processes, 0 renders the plots in "
+                     "this process.")
+        parser.add_argument(
+                "--force", action="store_true",
+                help="Render the plots that are already cached too.")
+
+    def get_jobs(self, plots):
+        registry = get_registered_plots()
+        unknown = set(plots) - set(registry)
+        if unknown:
+            raise CommandError("Unregistered plots: " +
+                               ", ".join(sorted(unknown)))
+        for path, plot_class in registry.items():
+            if plots and path not in plots:
+                continue
+            for args, kwargs in plot_class.get_cache_warm_arguments():
+                yield path, tuple(args), dict(kwargs)
+
+    def store(self, result):
+        backend_name, envelopes, timeout, delta = result
+        if not envelopes:
+            return "cached"
+        if timeout == -1:
+            caches[backend_name].set_many(envelopes)
+        else:
+            caches[backend_name].set_many(envelopes, timeout)
+        return f"rendered in {delta:.3f}s"
+
+    def report(self, index, total, job, outcome, error=False):
+        path, args, kwargs = job
+        arguments = ", ".join([repr(arg) for arg in args] +
+                              [f"{key}={value!r}"
+                               for key, value in kwargs.items()])
+        message = f"[{index}/{total}] {path}({arguments}): {outcome}"
+        if error:
+            self.stderr.write(message)
+        elif self.verbosity >= 1:
+            self.stdout.write(message)
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        jobs = list(self.get_jobs(options["plots"]))
+        total = len(jobs)
+        force = options["force"]
+        counts = {"rendered": 0, "cached": 0, "failed": 0}
+        start = time.perf_counter()
+
+        def finish(index, job, get_result):
+            try:
+                outcome = self.store(get_result())
+            except Exception as error:
+                counts["failed"] += 1
+                self.report(index, total, job, f"failed: {error!r}",
+                            error=True)
+                return
+            counts["cached" if outcome == "cached" else "rendered"] += 1
+            self.report(index, total, job, outcome)
+
+        if options["processes"] <= 0:
+            for index, job in enumerate(jobs, 1):
+                finish(index, job, lambda: warm_plot(*job, force))
+        elif jobs:
+            with ProcessPoolExecutor(max_workers=options["processes"],
+                                     initializer=initialize_job_worker) \
+                    as executor:
+                futures = {executor.submit(warm_plot_in_worker, *job, force):
+                           job for job in jobs}
+                for index, future in enumerate(as_completed(futures), 1):
+                    finish(index, futures[future], future.result)
+
+        elapsed = time.perf_counter() - start
+        summary = (f"Warmed {total} plots in {elapsed:.2f}s: "
+                   f"{counts['rendered']} rendered, {counts['cached']} "
+                   f"cached, {counts['failed']} failed.")
+        if counts["failed"]:
+            raise CommandError(summary)
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,101 @@
+"""
+    ==========
+    metrics.py
+    ==========
+
+    This module forwards the measures sent by the ``signals`` module to a
+    metrics sink, so render times, image sizes and cache hit ratios can be
+    sent to systems like StatsD or Prometheus.
+
+    The sink is set with the ``PLOTTINGS_METRICS_SINK`` setting, the dotted
+    path of a ``MetricsSink`` subclass, and nothing is forwarded when it is
+    not set. The sink receives the following metrics, tagged with the dotted
+    path of the ``plot`` class and, for renders, the ``format`` of the image:
+
+    * ``plottings.render.<stage>`` histograms with the seconds spent in every
+      stage of ``BasePlot.get_timings()``.
+    * ``plottings.render.size`` histogram with the size of the images.
+    * ``plottings.cache.hit`` and ``plottings.cache.miss`` counters.
+    * ``plottings.cache.lookup`` histogram with the seconds spent looking up
+      the cache.
+"""
+import threading
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.utils.module_loading import import_string
+from .signals import plot_cache_lookup, plot_rendered
+
+_sink = None
+_sink_loaded = False
+_sink_lock = threading.Lock()
+
+
+class MetricsSink:
+    """
+    Base class of the metrics sinks, override its methods to send the
+    metrics to a monitoring system.
+    """
+
+    def counter(self, name, value=1, tags=None):
+        """
+        Increments the counter ``name`` by ``value``.
+        """
+
+    def histogram(self, name, value, tags=None):
+        """
+        Records a ``value`` in the histogram ``name``.
+        """
+
+
+def get_metrics_sink():
+    """
+    Returns an instance of the sink set by the ``PLOTTINGS_METRICS_SINK``
+    setting or ``None`` when it is not set.
+    """
+    global _sink, _sink_loaded
+    if _sink_loaded:
+        return _sink
+    with _sink_lock:
+        if not _sink_loaded:
+            path = getattr(settings, "PLOTTINGS_METRICS_SINK", None)
+            _sink = import_string(path)() if path else None
+            _sink_loaded = True
+        return _sink
+
+
+def _get_plot_name(sender):
+    return f"{sender.__module__}.{sender.__qualname__}"
+
+
+def _record_render(sender, timings, size, format, **kwargs):
+    sink = get_metrics_sink()
+    if sink is None:
+        return
+    tags = {"plot": _get_plot_name(sender), "format": format}
+    for stage, seconds in timings.items():
+        if stage != "cache":
+            sink.histogram(f"plottings.render.{stage}", seconds, tags)
+    sink.histogram("plottings.render.size", size, tags)
+
+
+def _record_cache_lookup(sender, hit, duration, **kwargs):
+    sink = get_metrics_sink()
+    if sink is None:
+        return
+    tags = {"plot": _get_plot_name(sender)}
+    sink.counter("plottings.cache.hit" if hit else "plottings.cache.miss",
+                 1, tags)
+    sink.histogram("plottings.cache.lookup", duration, tags)
+
+
+def _reset_metrics_sink(setting, **kwargs):
+    global _sink, _sink_loaded
+    if setting == "PLOTTINGS_METRICS_SINK":
+        with _sink_lock:
+            _sink, _sink_loaded = None, False
+
+
+plot_rendered.connect(_record_render, dispatch_uid="plottings.metrics")
+plot_cache_lookup.connect(_record_cache_lookup,
+                          dispatch_uid="plottings.metrics")
+setting_changed.connect(_reset_metrics_sink)
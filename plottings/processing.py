@@ -0,0 +1,172 @@
+"""
+    =============
+    processing.py
+    =============
+
+    This module contains the functions used to post-process the images
+    rendered by Matplotlib before they are cached or served. Raster images
+    are handled as Pillow images and SVG documents as text.
+"""
+import re
+from io import BytesIO
+import numpy as np
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+
+def _to_palette(image):
+    pixels = np.asarray(image)
+    channels = pixels.shape[2]
+    keys = np.zeros(pixels.shape[:2], dtype=np.uint32)
+    for channel in range(channels):
+        keys = (keys << 8) | pixels[:, :, channel]
+    palette_keys, indexes = np.unique(keys, return_inverse=True)
+    palette = np.empty((len(palette_keys), channels), dtype=np.uint8)
+    for channel in reversed(range(channels)):
+        palette[:, channel] = palette_keys & 0xFF
+        palette_keys = palette_keys >> 8
+    result = Image.fromarray(indexes.reshape(keys.shape).astype(np.uint8),
+                             "P")
+    result.putpalette(palette[:, :3].tobytes(), rawmode="RGB")
+    if channels == 4:
+        result.info["transparency"] = palette[:, 3].tobytes()
+    return result, len(palette)
+
+
+def optimize_png(image, max_colors=256, quantize_colors=0,
+                 compress_level=9, strip_metadata=True):
+    """
+    Returns the Pillow ``image`` encoded as a smaller PNG file. The alpha
+    channel is dropped when the image is fully opaque and images with up to
+    ``max_colors`` colors are stored with a palette, with less bits per pixel
+    when there are 16 colors or less. None of these steps changes a pixel.
+
+    Setting ``quantize_colors`` above ``max_colors`` makes it lossy: images
+    with up to ``quantize_colors`` colors, like plots whose only extra colors
+    come from antialiasing, are quantized to ``max_colors`` colors, which
+    changes some pixels. Unless ``strip_metadata`` is ``False`` the text
+    chunks, like the software that created the image, are not written, the
+    resolution is always kept.
+    """
+    options = {"compress_level": compress_level}
+    if "dpi" in image.info:
+        options["dpi"] = image.info["dpi"]
+    if not strip_metadata and image.text:
+        info = PngInfo()
+        for key, value in image.text.items():
+            info.add_text(key, value)
+        options["pnginfo"] = info
+    if image.mode != "RGBA":
+        image = image.convert("RGBA")
+    if image.getextrema()[3][0] == 255:
+        image = image.convert("RGB")
+    max_colors = min(max_colors, 256)
+    colors = None
+    if max_colors and image.getcolors(max_colors) is not None:
+        image, colors = _to_palette(image)
+    elif max_colors and quantize_colors > max_colors and \
+            image.getcolors(quantize_colors) is not None:
+        image = image.quantize(max_colors,
+                               method=Image.Quantize.FASTOCTREE,
+                               dither=Image.Dither.NONE)
+        colors = max_colors
+    if colors is not None:
+        if "transparency" in image.info:
+            options["transparency"] = image.info["transparency"]
+        if colors <= 16:
+            options["bits"] = 1 if colors <= 2 else 2 if colors <= 4 else 4
+    image_buffer = BytesIO()
+    image.save(image_buffer, format="png", **options)
+    return image_buffer.getvalue()
+
+
+def optimize_png_file(value, **options):
+    """
+    Returns the PNG file ``value`` optimized with ``optimize_png()`` and the
+    given options. It is the function run in the render executor.
+    """
+    with Image.open(BytesIO(value)) as image:
+        return optimize_png(image, **options)
+
+
+_NUMBER = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_COORDINATES = re.compile(r'(\s(?:d|x|y|x1|y1|x2|y2|cx|cy|r|width|height|'
+                          r'points|transform|viewBox)=")([^"]*)"')
+_TRANSLATE = re.compile(r"translate\([^)]*\)")
+_STYLE = re.compile(r'\sstyle="[^"]*"')
+_STYLE_SEPARATOR = re.compile(r"\s*([:;])\s*")
+_COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+_METADATA = re.compile(r"<metadata>.*?</metadata>", re.DOTALL)
+_PATH_DEFINITION = re.compile(r'<path id="([^"]+)"([^>]*)/>')
+_SPACE_BETWEEN_TAGS = re.compile(r">\s+<")
+_SPACE = re.compile(r"\s+")
+_PATH_COMMAND = re.compile(r"\s*([A-Za-z])\s*")
+
+
+def _round_numbers(value, precision):
+    def replace(match):
+        number = f"{float(match.group()):.{precision}f}"
+        if "." in number:
+            number = number.rstrip("0").rstrip(".")
+        return "0" if number == "-0" else number
+    return _NUMBER.sub(replace, value)
+
+
+def _minify_coordinates(match, precision):
+    name, value = match.groups()
+    if precision is None:
+        pass
+    elif name == ' transform="':
+        value = _TRANSLATE.sub(
+                lambda match: _round_numbers(match.group(), precision),
+                value)
+    else:
+        value = _round_numbers(value, precision)
+    value = _SPACE.sub(" ", value).strip()
+    if name == ' d="':
+        value = _PATH_COMMAND.sub(r"\1", value)
+    return f'{name}{value}"'
+
+
+def _deduplicate_paths(document):
+    definitions = {}
+    duplicates = {}
+
+    def replace(match):
+        path_id, attributes = match.groups()
+        first_id = definitions.setdefault(attributes, path_id)
+        if first_id == path_id:
+            return match.group()
+        duplicates[path_id] = first_id
+        return ""
+
+    document = _PATH_DEFINITION.sub(replace, document)
+    if duplicates:
+        references = re.compile(r"#(%s)\b" % "|".join(
+            re.escape(path_id) for path_id in duplicates))
+        document = references.sub(
+                lambda match: "#" + duplicates[match.group(1)], document)
+    return document
+
+
+def minify_svg(document, precision=3, strip_metadata=True):
+    """
+    Returns a smaller version of the SVG ``document`` written by Matplotlib.
+    The coordinates are rounded to ``precision`` decimals, unless it is
+    ``None``, transforms only get their translations rounded because of the
+    scale factors. The path data, the styles and the whitespace between tags
+    are collapsed and the path definitions repeated with different ids are
+    merged. When
+    ``strip_metadata`` is ``True`` the comments and the ``metadata`` element,
+    with the creation date, are removed too.
+    """
+    if strip_metadata:
+        document = _COMMENT.sub("", document)
+        document = _METADATA.sub("", document)
+    document = _COORDINATES.sub(
+            lambda match: _minify_coordinates(match, precision), document)
+    document = _STYLE.sub(
+            lambda match: _STYLE_SEPARATOR.sub(r"\1", match.group()),
+            document)
+    document = _deduplicate_paths(document)
+    return _SPACE_BETWEEN_TAGS.sub("><", document).strip()
@@ -0,0 +1,99 @@
+"""
+    ===========
+    registry.py
+    ===========
+
+    This module keeps the registry of cached plot classes whose images are
+    rendered in advance by the ``warm_plot_cache`` management command, after
+    a deploy or a cache flush. Register the classes with the ``register``
+    decorator in the ``plots.py`` module of your apps, they are imported by
+    the command, and implement their ``get_cache_warm_arguments()`` class
+    method.
+"""
+import time
+from django.core.cache import caches
+from django.db import connections
+from django.http import HttpRequest
+from django.utils.module_loading import autodiscover_modules, import_string
+from django.views import View
+from .base import CachedMixin
+from .links import get_plot_path
+
+_registry = {}
+
+
+def register(plot_class):
+    """
+    Class decorator that adds a cached plot class to the registry.
+    """
+    if not issubclass(plot_class, CachedMixin):
+        raise ValueError(f"{plot_class.__qualname__} is not a cached plot")
+    _registry[get_plot_path(plot_class)] = plot_class
+    return plot_class
+
+
+def unregister(plot_class):
+    """
+    Removes a plot class from the registry.
+    """
+    _registry.pop(get_plot_path(plot_class), None)
+
+
+def get_registered_plots():
+    """
+    Returns a dict with the registered plot classes by their dotted path,
+    once the ``plots`` modules of the installed apps are imported.
+    """
+    autodiscover_modules("plots")
+    return dict(_registry)
+
+
+def build_plot(plot_class, args, kwargs):
+    """
+    Returns an instance of ``plot_class`` built with the given arguments.
+    Views are set up with an empty GET request and the arguments as the URL
+    arguments.
+    """
+    if issubclass(plot_class, View):
+        request = HttpRequest()
+        request.method = "GET"
+        plot = plot_class()
+        plot.setup(request, *args, **kwargs)
+        return plot
+    return plot_class(*args, **kwargs)
+
+
+def warm_plot(path, args, kwargs, force=False):
+    """
+    Renders the image of a plot unless it is cached or ``force`` is ``True``.
+    It returns the name of the cache backend, a dict with the envelopes to be
+    stored by cache key, empty if it was cached, the timeout and the render
+    time, so the caller stores them. The dict includes the variants stored
+    with ``store_image()``, like the other encodings of ``CachedSVGPlotView``
+    or the other formats of ``CachedImagePlotView``. It is the job that the
+    ``warm_plot_cache`` command sends to its worker processes.
+    """
+    plot = build_plot(import_string(path), args, kwargs)
+    cache_backend = caches[plot.cache_backend_name]
+    cache_key = plot.get_cache_key()
+    if not force:
+        image_value, metadata = plot._read_cache(cache_backend, cache_key)
+        if image_value is not None:
+            return plot.cache_backend_name, {}, None, 0
+    plot._stored_images = {}
+    start = time.perf_counter()
+    image_file, envelope = plot._render_envelope()
+    delta = time.perf_counter() - start
+    envelopes = {**plot._stored_images, cache_key: envelope}
+    return plot.cache_backend_name, envelopes, plot.cache_timeout, delta
+
+
+def warm_plot_in_worker(path, args, kwargs, force=False):
+    """
+    Calls ``warm_plot()`` and closes the database connections opened by the
+    worker process.
+    """
+    try:
+        return warm_plot(path, args, kwargs, force)
+    finally:
+        connections.close_all()
@@ -0,0 +1,24 @@
+"""
+    ==========
+    signals.py
+    ==========
+
+    Signals sent while the plots are built, they are sent with the plot class
+    as sender and the plot instance as the ``plot`` argument.
+
+    ``plot_rendered`` is sent when an image is rendered with the
+    ``timings`` dict of the stages in seconds: ``data`` for
+    ``get_plot_data()``, ``plot`` for the plotter function, ``save`` for
+    ``savefig()`` and ``process`` for ``process_image()``, or ``render``
+    instead of ``plot`` and ``save`` when the plot was rendered in a worker
+    process. The ``size`` in bytes and the ``format`` of the image are sent
+    too.
+
+    ``plot_cache_lookup`` is sent when a cached plot is looked up with the
+    ``key``, whether it was a ``hit`` and the ``duration`` of the lookup in
+    seconds.
+"""
+from django.dispatch import Signal
+
+plot_rendered = Signal()
+plot_cache_lookup = Signal()
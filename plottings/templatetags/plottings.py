@@ -0,0 +1,23 @@
+"""
+    ============
+    plottings.py
+    ============
+
+    Template tags to link plots from templates. Load them with
+    ``{% load plottings %}``.
+"""
+from django import template
+from ..links import get_plot_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def plot_url(plot_class, *args, **kwargs):
+    """
+    Returns the URL of the image of a plot built calling ``plot_class``, a
+    class or its dotted path, with the given arguments::
+
+        <img src="{% plot_url "reports.plots.ActivitiesPlot" user.pk %}"/>
+    """
+    return get_plot_url(plot_class, *args, **kwargs)
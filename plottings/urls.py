@@ -0,0 +1,20 @@
+"""
+    =======
+    urls.py
+    =======
+
+    URL configuration of the view that serves the plots linked from templates,
+    include it in the project URL configuration:
+
+    .. code:: python
+
+        path("plots/", include("plottings.urls")),
+"""
+from django.urls import path
+from .views import PlotLinkView
+
+app_name = "plottings"
+
+urlpatterns = [
+        path("<str:token>", PlotLinkView.as_view(), name="plot"),
+    ]
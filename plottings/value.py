@@ -8,6 +8,7 @@
     within the html document.
 """
 from base64 import b64encode
+from django.utils.functional import cached_property
 from django.utils.safestring import mark_safe
 from .base import (
         BasePlot,
@@ -22,6 +23,10 @@ class ValueMixin:
     This mixins provides ``BasePlot`` with the ``get_value()`` method that
     returns a safe string to be used inside a template. It also has the magic
     method ``__str__.py`` so it can be inyected to the template.
+
+    The plot is rendered the first time the value is output and the result
+    is kept in the instance, so a plot used many times in a template is only
+    rendered once. Testing the plot in ``{% if %}`` tags doesn't render it.
     """
 
     def get_value(self):
@@ -29,27 +34,76 @@ class ValueMixin:
         Add the returned value of this method to the context dictionary that is
         passed to render the template.
         """
-        image_buffer = self.get_image()
-        value = image_buffer.getvalue()
-        return mark_safe(value)
+        try:
+            return self._value
+        except AttributeError:
+            self._value = self.format_value(self.get_image())
+            return self._value
+
+    def format_value(self, image_buffer):
+        """
+        Returns the safe string of the image stored in ``image_buffer``. It is
+        used to build the values of images rendered out of ``get_value()``,
+        see ``batch.get_values()``.
+        """
+        return mark_safe(image_buffer.getvalue())
+
+    def __str__(self):
+        return self.get_value()
+
+    def __html__(self):
+        return self.get_value()
+
+    def __bool__(self):
+        return True
+
+
+class LazyPlotValue:
+    """
+    Template value that builds an instance of ``plot_class`` with the given
+    arguments and renders it the first time it is output, so plots whose
+    construction is expensive cost nothing when the template doesn't show
+    them. It can be passed around ``{% include %}`` tags freely and it is
+    rendered at most once.
+    """
+
+    def __init__(self, plot_class, *args, **kwargs):
+        self.plot_class = plot_class
+        self.args = args
+        self.kwargs = kwargs
+
+    @cached_property
+    def plot(self):
+        """
+        The plot instance, built on first access.
+        """
+        return self.plot_class(*self.args, **self.kwargs)
+
+    def get_value(self):
+        return self.plot.get_value()
 
     def __str__(self):
         return self.get_value()
 
+    def __html__(self):
+        return self.get_value()
+
+    def __bool__(self):
+        return True
+
 
 class Base64ValueMixin:
     """
     This mixin provides the ``BasePlot`` class with base64 encoding of its
-    provided value through ``get_value()`` method. It also has the magic
-    method ``__str__.py`` so it can be inyected to the template.
+    provided value through ``format_value()`` method, it must be placed
+    before ``ValueMixin``.
 
     """
-    def get_value(self):
+    def format_value(self, image_buffer):
         """
-        Add the returned value of this method to the context dictionary that is
-        passed to render the template.
+        Returns the image stored in ``image_buffer`` encoded in base64 as a
+        safe string.
         """
-        image_buffer = self.get_image()
         value = image_buffer.getvalue()
         return mark_safe(b64encode(value).decode("utf-8"))
 
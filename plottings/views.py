@@ -7,10 +7,99 @@
     to requests with HttpResponse objects with Matplotlib figures as payload.
 
 """
+import gzip
+import os.path
+from io import BytesIO, StringIO
 from typing import Any
+from datetime import timezone as dt_timezone
+from django.core import signing
 from django.views import View
-from django.http import HttpResponse
-from .base import CachedMixin, SVGZPlotMixin, PNGPlotMixin
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import (
+        get_conditional_response,
+        patch_cache_control,
+        patch_vary_headers,
+        )
+from django.utils.http import http_date, quote_etag
+from asgiref.sync import sync_to_async
+from PIL import Image, features
+from .base import (
+        CachedMixin,
+        SVGPlotMixin,
+        SVGZPlotMixin,
+        PNGPlotMixin,
+        get_buffer_size,
+        )
+from .cache import get_content_hash
+from .links import load_plot_token
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+def parse_accept_header(value):
+    """
+    Parses the value of an ``Accept`` or ``Accept-Encoding`` header and
+    returns a dict with the quality of every listed token.
+    """
+    result = {}
+    for item in value.split(","):
+        token, *params = [part.strip() for part in item.split(";")]
+        if not token:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, number = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(number)
+                except ValueError:
+                    quality = 0.0
+        result[token.lower()] = quality
+    return result
+
+
+def negotiate(accepted, available, default, wildcards=True):
+    """
+    Returns the token of ``available``, in order of preference, with the
+    highest quality in the ``accepted`` dict or ``default`` when none of them
+    is accepted. Wildcards ending in ``*`` match any token with the same
+    prefix unless ``wildcards`` is ``False``.
+    """
+    best, best_quality = default, 0.0
+    for token in available:
+        quality = accepted.get(token)
+        if quality is None and wildcards:
+            quality = max((value for key, value in accepted.items()
+                           if key.endswith("*") and
+                           token.startswith(key[:-1])), default=None)
+        if quality is not None and quality > best_quality:
+            best, best_quality = token, quality
+    return best
+
+
+SERVER_TIMING_STAGES = ["cache", "data", "plot", "save", "render", "process"]
+
+
+def format_server_timing(timings, cache_hit=None):
+    """
+    Returns the value of a ``Server-Timing`` header with the durations of
+    the ``timings`` dict, in seconds as returned by
+    ``BasePlot.get_timings()``. The ``cache`` entry is described as ``hit``
+    or ``miss`` when ``cache_hit`` is not ``None``.
+    """
+    entries = []
+    for stage in SERVER_TIMING_STAGES:
+        if stage not in timings:
+            continue
+        entry = stage
+        if stage == "cache" and cache_hit is not None:
+            entry += ';desc="hit"' if cache_hit else ';desc="miss"'
+        entries.append(f"{entry};dur={timings[stage] * 1000:.3f}")
+    return ", ".join(entries)
 
 
 class BasePlotView(View):
@@ -18,6 +107,18 @@ class BasePlotView(View):
     A Django View class that has the common logic of all project's View
     classes. It is not intended to be used in production but instead to be
     subclassed and extended via mixins.
+
+    Setting ``streaming`` to ``True`` returns the image in a
+    ``StreamingHttpResponse`` that sends it in chunks of ``chunk_size`` bytes
+    sliced from the image buffer.
+
+    The ``bytes`` object stored in the image buffer becomes the body of the
+    response, buffers built from a cached value share it, so the image is
+    not copied on its way from the cache to the response.
+
+    Setting ``server_timing`` to ``True`` adds a ``Server-Timing`` header
+    with the time spent in each stage of the building of the plot, so it can
+    be inspected in the developer tools of the browser.
     """
     http_response_class = HttpResponse
     buffer_class: Any = None
@@ -26,6 +127,12 @@ class BasePlotView(View):
     encoding = ""
     disposition = ""  # values: inline, attachment
     mimetype = ""
+    max_age = None
+    content_etag = True
+    head_content_length = True
+    streaming = False
+    chunk_size = 64 * 1024
+    server_timing = False
     http_method_names = [
             "get",
             "head",
@@ -60,10 +167,164 @@ class BasePlotView(View):
         """
         return self.encoding
 
+    def get_etag(self):
+        """
+        Override this method to provide the ETag of the plot without rendering
+        it, so conditional requests can be answered straight away. When it
+        returns ``None`` and ``content_etag`` is set the ETag is computed from
+        the rendered image.
+        """
+        return None
+
+    def get_last_modified(self):
+        """
+        Override this method to return the ``datetime`` of the last change of
+        the plot data, it is used to answer ``If-Modified-Since`` requests.
+        """
+        return None
+
+    def get_max_age(self):
+        """
+        Override this method if you want to dinamically set the ``max-age``
+        directive of the ``Cache-Control`` header.
+        """
+        return self.max_age
+
+    def get_image_metadata(self):
+        """
+        Returns a dict with the metadata of the image, if it is known without
+        rendering it. The ``size`` key is used as the ``Content-Length`` of
+        HEAD responses.
+        """
+        return None
+
+    def _get_last_modified_timestamp(self, last_modified=None):
+        if last_modified is None:
+            last_modified = self.get_last_modified()
+        if last_modified is None:
+            return None
+        if not timezone.is_aware(last_modified):
+            last_modified = timezone.make_aware(last_modified,
+                                                dt_timezone.utc)
+        return int(last_modified.timestamp())
+
+    def _get_content_etag(self, buffer):
+        return quote_etag(get_content_hash(buffer.getvalue()))
+
+    def get_vary_headers(self):
+        """
+        Returns the list of request headers the response depends on, they
+        are added to the ``Vary`` header.
+        """
+        return []
+
+    def _set_conditional_headers(self, response, etag, last_modified):
+        vary_headers = self.get_vary_headers()
+        if vary_headers:
+            patch_vary_headers(response, vary_headers)
+        if etag is not None:
+            response.headers["ETag"] = etag
+        if last_modified is not None:
+            response.headers["Last-Modified"] = http_date(last_modified)
+        max_age = self.get_max_age()
+        if max_age is not None:
+            patch_cache_control(response, max_age=max_age)
+        return response
+
+    def _get_not_modified_response(self, request, etag, last_modified):
+        response = get_conditional_response(request, etag=etag,
+                                            last_modified=last_modified)
+        if response is not None:
+            self._set_conditional_headers(response, etag, last_modified)
+        return response
+
+    def _get_image_response(self, request, buffer, etag, last_modified,
+                            include_body):
+        if isinstance(buffer, StringIO):
+            # The response and its Content-Length are made of UTF-8 bytes.
+            buffer = BytesIO(buffer.getvalue().encode("utf-8"))
+        if etag is None and self.content_etag:
+            etag = self._get_content_etag(buffer)
+            response = self._get_not_modified_response(request, etag,
+                                                       last_modified)
+            if response is not None:
+                return response
+
+        headers = self.get_headers(buffer)
+        content_type = self.get_mimetype()
+        if include_body and self.streaming:
+            response = StreamingHttpResponse(
+                    self._get_streaming_content(buffer),
+                    content_type=content_type)
+        else:
+            content = buffer.getvalue() if include_body else b""
+            response = self.http_response_class(content,
+                                                content_type=content_type)
+        for key, value in headers.items():
+            response.headers[key] = value
+        return self._set_conditional_headers(response, etag, last_modified)
+
+    def _iter_chunks(self, buffer):
+        view = memoryview(buffer.getvalue())
+        try:
+            for start in range(0, view.nbytes, self.chunk_size):
+                yield view[start:start + self.chunk_size]
+        finally:
+            view.release()
+
+    def _get_streaming_content(self, buffer):
+        return self._iter_chunks(buffer)
+
+    def _get_metadata_last_modified(self, metadata, last_modified):
+        # GET and HEAD responses carry the same Last-Modified, taken from the
+        # cached image when the view doesn't provide one.
+        if last_modified is None and metadata is not None and \
+                "created" in metadata:
+            return int(metadata["created"])
+        return last_modified
+
+    def _get_response(self, request, include_body):
+        metadata = self.get_image_metadata()
+        etag = self.get_etag()
+        last_modified = self._get_metadata_last_modified(
+                metadata, self._get_last_modified_timestamp())
+        response = self._get_not_modified_response(request, etag,
+                                                   last_modified)
+        if response is not None:
+            return response
+
+        if not include_body:
+            if metadata is not None or not self.head_content_length:
+                return self._get_head_response(metadata, etag, last_modified)
+
+        buffer = self.get_image()
+        if metadata is None:
+            # Cached plots know the hash of the image once it is rendered.
+            etag = self.get_etag()
+        return self._get_image_response(request, buffer, etag, last_modified,
+                                        include_body)
+
+    def _get_head_response(self, metadata, etag, last_modified):
+        headers = self.get_headers(None)
+        content_type = self.get_mimetype()
+        if metadata is not None:
+            headers['Content-Length'] = metadata["size"]
+            response = self.http_response_class(b"",
+                                                content_type=content_type)
+        else:
+            # A streaming response prevents middlewares from adding a
+            # Content-Length of the empty body.
+            response = StreamingHttpResponse(iter(()),
+                                             content_type=content_type)
+        for key, value in headers.items():
+            response.headers[key] = value
+        return self._set_conditional_headers(response, etag, last_modified)
+
     def get_headers(self, buffer):
         """
         Returns a dict of parameters to be used as headers of the response
         object. Override it to provide extend the values it contains.
+        ``buffer`` is ``None`` when the image is not rendered.
         """
         result = {}
 
@@ -79,34 +340,106 @@ class BasePlotView(View):
         encoding = self.get_encoding()
         if encoding:
             result['Content-Encoding'] = encoding
-        result['Content-Length'] = buffer.getbuffer().nbytes
+        if buffer is not None:
+            result['Content-Length'] = get_buffer_size(buffer)
+        if self.server_timing:
+            server_timing = self.get_server_timing()
+            if server_timing:
+                result['Server-Timing'] = server_timing
         return result
 
+    def get_server_timing(self):
+        """
+        Returns the value of the ``Server-Timing`` header, see
+        ``format_server_timing()``.
+        """
+        return format_server_timing(self.get_timings(),
+                                    getattr(self, "cache_hit", None))
+
     def get(self, request, *args, **kwargs):
         """
         This methods generates the GET response.
         """
-        buffer = self.get_image()
-        headers = self.get_headers(buffer)
-
-        response = self.http_response_class(buffer,
-                                            content_type=self.get_mimetype())
-        for key, value in headers.items():
-            response.headers[key] = value
-        return response
+        return self._get_response(request, include_body=True)
 
     def head(self, request, *args, **kwargs):
         """
-        This methods generates the HEAD response.
+        This methods generates the HEAD response. It is built from the
+        cached image metadata when available, otherwise the image is rendered
+        to compute the ``Content-Length`` unless ``head_content_length`` is
+        ``False``.
         """
-        buffer = self.get_image()
-        headers = self.get_headers(buffer)
+        return self._get_response(request, include_body=False)
 
-        response = self.http_response_class(b"",
-                                            content_type=self.get_mimetype())
-        for key, value in headers.items():
-            response.headers[key] = value
-        return response
+
+class AsyncBasePlotView(BasePlotView):
+    """
+    Async version of ``BasePlotView`` for ASGI deployments. Cache lookups are
+    done with the async cache API in the event loop and the plots are
+    rendered in threads, or in the render executor. Override
+    ``aget_plot_data()`` to load the data with the async ORM.
+    """
+
+    async def aget_etag(self):
+        """
+        Async version of ``get_etag()``.
+        """
+        return self.get_etag()
+
+    async def aget_last_modified(self):
+        """
+        Async version of ``get_last_modified()``. By default an overridden
+        ``get_last_modified()`` is called in a thread.
+        """
+        if type(self).get_last_modified is BasePlotView.get_last_modified:
+            return None
+        return await sync_to_async(self.get_last_modified)()
+
+    async def aget_image_metadata(self):
+        """
+        Async version of ``get_image_metadata()``.
+        """
+        return self.get_image_metadata()
+
+    async def _aiter_chunks(self, buffer):
+        for chunk in self._iter_chunks(buffer):
+            yield chunk
+
+    def _get_streaming_content(self, buffer):
+        return self._aiter_chunks(buffer)
+
+    async def _aget_response(self, request, include_body):
+        metadata = await self.aget_image_metadata()
+        etag = await self.aget_etag()
+        last_modified = self._get_metadata_last_modified(
+                metadata, self._get_last_modified_timestamp(
+                    await self.aget_last_modified()))
+        response = self._get_not_modified_response(request, etag,
+                                                   last_modified)
+        if response is not None:
+            return response
+
+        if not include_body:
+            if metadata is not None or not self.head_content_length:
+                return self._get_head_response(metadata, etag, last_modified)
+
+        buffer = await self.aget_image()
+        if metadata is None:
+            etag = await self.aget_etag()
+        return self._get_image_response(request, buffer, etag, last_modified,
+                                        include_body)
+
+    async def get(self, request, *args, **kwargs):
+        """
+        This methods generates the GET response.
+        """
+        return await self._aget_response(request, include_body=True)
+
+    async def head(self, request, *args, **kwargs):
+        """
+        This methods generates the HEAD response.
+        """
+        return await self._aget_response(request, include_body=False)
 
 
 class PNGPlotView(PNGPlotMixin, BasePlotView):
@@ -147,5 +480,313 @@ class CachedSVGZPlotView(CachedMixin, SVGZPlotMixin, BasePlotView):
     mimetype = "image/svg+xml"
 
 
+class AsyncPNGPlotView(PNGPlotMixin, AsyncBasePlotView):
+    """
+    An async Django ``View`` class that returns a PNG graphic file as
+    ``HttpResponse`` payload.
+    """
+    disposition = "inline"
+    mimetype = "image/png"
+
+
+class AsyncSVGZPlotView(SVGZPlotMixin, AsyncBasePlotView):
+    """
+    An async Django ``View`` class that returns a SVGZ graphic file as
+    ``HttpResponse`` payload.
+    """
+    disposition = "inline"
+    encoding = "gzip"
+    mimetype = "image/svg+xml"
+
+
+class AsyncCachedPNGPlotView(CachedMixin, PNGPlotMixin, AsyncBasePlotView):
+    """
+    An async Django ``View`` class that returns a cached PNG graphic file as
+    ``HttpResponse`` payload.
+    """
+    disposition = "inline"
+    mimetype = "image/png"
+
+
+class AsyncCachedSVGZPlotView(CachedMixin, SVGZPlotMixin, AsyncBasePlotView):
+    """
+    An async Django ``View`` class that returns a cached SVGZ graphic file as
+    ``HttpResponse`` payload.
+    """
+    disposition = "inline"
+    encoding = "gzip"
+    mimetype = "image/svg+xml"
+
+
+class SVGEncodingMixin:
+    """
+    Mixin to generate an SVG figure encoded with the best content coding
+    accepted by the client. Available codings are brotli, when the
+    ``brotli`` package is installed, gzip and identity. Cached classes render
+    the plot once and store all the variants, each one under its own key.
+    """
+    buffer_class = BytesIO
+    file_format = "svg"
+    mimetype = "image/svg+xml"
+    content_codings = ["br", "gzip", "identity"]
+    gzip_level = 9
+    brotli_quality = 11
+
+    def get_content_codings(self):
+        """
+        Returns the list of available content codings in order of
+        preference.
+        """
+        return [coding for coding in self.content_codings
+                if coding != "br" or brotli is not None]
+
+    def get_content_coding(self):
+        """
+        Returns the content coding negotiated with the ``Accept-Encoding``
+        header of the request.
+        """
+        try:
+            return self._content_coding
+        except AttributeError:
+            pass
+        header = self.request.META.get("HTTP_ACCEPT_ENCODING", "")
+        accepted = parse_accept_header(header)
+        accepted.setdefault("identity", 0.001)
+        self._content_coding = negotiate(accepted,
+                                         self.get_content_codings(),
+                                         "identity")
+        return self._content_coding
+
+    def get_encoding(self):
+        coding = self.get_content_coding()
+        return "" if coding == "identity" else coding
+
+    def get_vary_headers(self):
+        return super().get_vary_headers() + ["Accept-Encoding"]
+
+    def encode_image(self, value, coding):
+        """
+        Returns the SVG document ``value`` encoded with ``coding``.
+        """
+        if coding == "gzip":
+            return gzip.compress(value, compresslevel=self.gzip_level,
+                                 mtime=0)
+        if coding == "br":
+            return brotli.compress(value, quality=self.brotli_quality)
+        return value
+
+    def get_cache_key(self):
+        return f"{super().get_cache_key()}:{self.get_content_coding()}"
+
+    def process_image(self, image_buffer):
+        image_buffer = super().process_image(image_buffer)
+        value = image_buffer.getvalue()
+        coding = self.get_content_coding()
+        if isinstance(self, CachedMixin):
+            cache_key = super().get_cache_key()
+            for other in self.get_content_codings():
+                if other != coding:
+                    self.store_image(f"{cache_key}:{other}",
+                                     self.encode_image(value, other))
+        return self.buffer_class(self.encode_image(value, coding))
+
+
+class SVGPlotView(SVGEncodingMixin, SVGPlotMixin, BasePlotView):
+    """
+    A Django ``View`` class that returns a SVG graphic file, compressed with
+    the best encoding accepted by the client, as ``HttpResponse`` payload.
+    """
+    disposition = "inline"
+
+
+class CachedSVGPlotView(SVGEncodingMixin, CachedMixin, SVGPlotMixin,
+                        BasePlotView):
+    """
+    A Django ``View`` class that returns a SVG graphic file, compressed with
+    the best encoding accepted by the client, as ``HttpResponse`` payload.
+    All the encodings are cached from a single rendering.
+    """
+    disposition = "inline"
+
+
+class ImageFormatMixin:
+    """
+    Mixin to generate a raster figure in the best format accepted by the
+    client, AVIF or WebP when they are listed in the ``Accept`` header of the
+    request and supported by Pillow, falling back to PNG. The figure is
+    rendered once and every format is encoded from the same pixels, cached
+    classes store all the variants, each one under its own key.
+    """
+    buffer_class = BytesIO
+    file_format = "png"
+    image_formats = ["avif", "webp", "png"]
+    image_format_options = {
+            "avif": {"quality": 90},
+            "webp": {"lossless": True},
+            "png": {},
+            }
+
+    def get_image_formats(self):
+        """
+        Returns the list of available image formats in order of preference.
+        """
+        return [image_format for image_format in self.image_formats
+                if image_format == "png" or features.check(image_format)]
+
+    def get_image_format(self):
+        """
+        Returns the image format negotiated with the ``Accept`` header of the
+        request. Formats other than PNG have to be listed explicitly.
+        """
+        try:
+            return self._image_format
+        except AttributeError:
+            pass
+        accepted = parse_accept_header(self.request.META.get("HTTP_ACCEPT",
+                                                             ""))
+        available = {f"image/{image_format}": image_format
+                     for image_format in self.get_image_formats()}
+        mimetype = negotiate(accepted, list(available), "image/png",
+                             wildcards=False)
+        self._image_format = available.get(mimetype, "png")
+        return self._image_format
+
+    def get_filetype(self):
+        return self.get_image_format()
+
+    def get_render_format(self):
+        return "png"
+
+    def get_mimetype(self):
+        return f"image/{self.get_image_format()}"
+
+    def get_filename(self):
+        filename = super().get_filename()
+        if not filename:
+            return filename
+        return f"{os.path.splitext(filename)[0]}.{self.get_image_format()}"
+
+    def get_vary_headers(self):
+        return super().get_vary_headers() + ["Accept"]
+
+    def get_save_options(self):
+        options = super().get_save_options()
+        options.setdefault("pil_kwargs", {"compress_level": 0})
+        return options
+
+    def get_render_processor(self):
+        # Every format is encoded by process_image() from the same pixels.
+        return None
+
+    def encode_image(self, image, image_format):
+        """
+        Returns the Pillow ``image`` encoded in ``image_format``, PNG files
+        are optimized when ``png_optimize`` is ``True``.
+        """
+        if image_format == "png" and self.png_optimize:
+            return self.encode_png(image)
+        options = self.image_format_options.get(image_format, {})
+        image_buffer = BytesIO()
+        image.save(image_buffer, format=image_format, **options)
+        return image_buffer.getvalue()
+
+    def get_cache_key(self):
+        return f"{super().get_cache_key()}:{self.get_image_format()}"
+
+    def process_image(self, image_buffer):
+        image_buffer.seek(0)
+        with Image.open(image_buffer) as image:
+            image.load()
+        image_format = self.get_image_format()
+        if isinstance(self, CachedMixin):
+            cache_key = super().get_cache_key()
+            for other in self.get_image_formats():
+                if other != image_format:
+                    self.store_image(f"{cache_key}:{other}",
+                                     self.encode_image(image, other),
+                                     format=other)
+        return self.buffer_class(self.encode_image(image, image_format))
+
+
+class ImagePlotView(ImageFormatMixin, PNGPlotMixin, BasePlotView):
+    """
+    A Django ``View`` class that returns an AVIF, WebP or PNG graphic file,
+    the best format accepted by the client, as ``HttpResponse`` payload.
+    """
+    disposition = "inline"
+
+
+class CachedImagePlotView(ImageFormatMixin, CachedMixin, PNGPlotMixin,
+                          BasePlotView):
+    """
+    A Django ``View`` class that returns an AVIF, WebP or PNG graphic file,
+    the best format accepted by the client, as ``HttpResponse`` payload.
+    All the formats are cached from a single rendering.
+    """
+    disposition = "inline"
+
+
+class PlotLinkView(BasePlotView):
+    """
+    A Django ``View`` class that serves the plots linked with the
+    ``links.get_plot_url()`` function and the ``plot_url`` template tag. The
+    plot is built from the signed token of the URL and its image is returned
+    as ``HttpResponse`` payload, cached plots answer conditional and HEAD
+    requests without rendering. Set ``token_max_age`` to reject tokens older
+    than that number of seconds.
+    """
+    disposition = "inline"
+    token_max_age = None
+    file_types = {
+            "png": ("image/png", ""),
+            "svg": ("image/svg+xml", ""),
+            "svgz": ("image/svg+xml", "gzip"),
+            }
+
+    def get_plot(self):
+        """
+        Returns the plot instance built from the token of the URL, it raises
+        ``Http404`` when the token is not valid.
+        """
+        try:
+            return self._plot
+        except AttributeError:
+            pass
+        try:
+            self._plot = load_plot_token(self.kwargs["token"],
+                                         max_age=self.token_max_age)
+        except (signing.BadSignature, ImportError, ValueError) as error:
+            raise Http404("Invalid plot token") from error
+        return self._plot
+
+    def get_mimetype(self):
+        filetype = self.get_plot().get_filetype()
+        return self.file_types.get(filetype, ("", ""))[0]
+
+    def get_encoding(self):
+        filetype = self.get_plot().get_filetype()
+        return self.file_types.get(filetype, ("", ""))[1]
+
+    def get_etag(self):
+        plot = self.get_plot()
+        if isinstance(plot, CachedMixin):
+            return plot.get_etag()
+        return None
+
+    def get_image_metadata(self):
+        plot = self.get_plot()
+        if isinstance(plot, CachedMixin):
+            return plot.get_image_metadata()
+        return None
+
+    def get_image(self):
+        return self.get_plot().get_image()
+
+    def get_server_timing(self):
+        plot = self.get_plot()
+        return format_server_timing(plot.get_timings(),
+                                    getattr(plot, "cache_hit", None))
+
+
 SVGViewPlot = CachedSVGZPlotView
 PNGViewPlot = CachedPNGPlotView
@@ -0,0 +1,276 @@
+"""
+    ==================
+    benchmark_plots.py
+    ==================
+
+    Management command that measures the rendering and caching paths of the
+    library with the activity plot of the test app, so the figures of
+    different versions can be compared. Run it with a local memory cache,
+    the default of the test app:
+
+        python manage.py benchmark_plots --iterations 50 --json out.json
+
+    Every case is run ``--warmup`` times, then timed ``--iterations`` times
+    and run once more under ``tracemalloc`` to measure its peak memory.
+"""
+import json
+import math
+import platform
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+import django
+import matplotlib
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.test.client import RequestFactory
+import plottings
+from plottings import (
+        CachedPNGBase64PlotToValue,
+        CachedPNGPlotView,
+        PNGBase64PlotToValue,
+        SVGPlotToValue,
+        )
+from plottings.base import SVGZPlotMixin
+from plottings_tests.data import ActivityMap
+from plottings_tests.plots import activity_plot
+
+
+class BenchmarkMixin:
+    """
+    Activity plot with the same random data on every run.
+    """
+    plotter_function = staticmethod(activity_plot)
+    number_of_events = 400
+    today = date(2024, 6, 5)
+    seed = 0
+
+    def __init__(self, **kwargs):
+        generator = random.Random(self.seed)
+        self.map = ActivityMap(self.today)
+        self.map.load_activity([
+                self.today - timedelta(generator.randrange(365))
+                for _ in range(self.number_of_events)])
+
+    def get_plot_options(self):
+        return {"xticks": self.map.get_x_ticks(),
+                "yticks": self.map.get_y_ticks(),
+                }
+
+    def get_plot_data(self):
+        return self.map.get_data()
+
+
+class PNGPlot(BenchmarkMixin, PNGBase64PlotToValue):
+    pass
+
+
+class SVGPlot(BenchmarkMixin, SVGPlotToValue):
+    pass
+
+
+class SVGZPlot(BenchmarkMixin, SVGZPlotMixin):
+    pass
+
+
+class CachedPNGPlot(BenchmarkMixin, CachedPNGBase64PlotToValue):
+    pass
+
+
+class PNGPlotView(BenchmarkMixin, CachedPNGPlotView):
+    filename = "activity.png"
+
+
+class Case:
+    """
+    A benchmark case, ``setup()`` is called once before running it and
+    ``prepare()`` before every run, none of them are timed.
+    """
+    name = ""
+    description = ""
+
+    def setup(self):
+        pass
+
+    def prepare(self):
+        pass
+
+    def run(self):
+        raise NotImplementedError("Benchmark cases require a run method")
+
+
+class RenderCase(Case):
+    plot_class = None
+
+    def run(self):
+        self.plot_class().get_image()
+
+
+class PNGRenderCase(RenderCase):
+    name = "render-png"
+    description = "Renders the PNG image"
+    plot_class = PNGPlot
+
+
+class SVGRenderCase(RenderCase):
+    name = "render-svg"
+    description = "Renders the SVG document"
+    plot_class = SVGPlot
+
+
+class SVGZRenderCase(RenderCase):
+    name = "render-svgz"
+    description = "Renders and compresses the SVG document"
+    plot_class = SVGZPlot
+
+
+class CacheMissCase(Case):
+    name = "cache-miss"
+    description = "Looks up a missing PNG, renders and stores it"
+
+    def prepare(self):
+        plot = CachedPNGPlot()
+        caches[plot.cache_backend_name].delete(plot.get_cache_key())
+
+    def run(self):
+        CachedPNGPlot().get_image()
+
+
+class CacheHitCase(Case):
+    name = "cache-hit"
+    description = "Loads the data and reads a cached PNG"
+
+    def setup(self):
+        CachedPNGPlot().get_image()
+
+    def run(self):
+        CachedPNGPlot().get_image()
+
+
+class Base64ValueCase(CacheHitCase):
+    name = "value-base64"
+    description = "Builds the base64 value of a cached PNG"
+
+    def run(self):
+        str(CachedPNGPlot().get_value())
+
+
+class ViewCase(Case):
+    name = "view-response"
+    description = "Builds the response of a view with a cached PNG"
+
+    def setup(self):
+        self.view = PNGPlotView.as_view()
+        self.request = RequestFactory().get("/activity.png")
+        self.run()
+
+    def run(self):
+        response = self.view(self.request)
+        if response.status_code != 200:
+            raise CommandError(f"Unexpected status {response.status_code}")
+
+
+CASES = [PNGRenderCase, SVGRenderCase, SVGZRenderCase, CacheMissCase,
+         CacheHitCase, Base64ValueCase, ViewCase]
+
+
+def percentile(values, percent):
+    """
+    Returns the ``percent`` percentile of the sorted ``values`` using the
+    nearest rank method.
+    """
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def measure(case, iterations, warmup):
+    """
+    Runs ``case`` and returns a dict with its latencies in milliseconds,
+    its throughput in runs per second and its peak memory in bytes.
+    """
+    case.setup()
+    for _ in range(warmup):
+        case.prepare()
+        case.run()
+    durations = []
+    for _ in range(iterations):
+        case.prepare()
+        start = time.perf_counter()
+        case.run()
+        durations.append(time.perf_counter() - start)
+    case.prepare()
+    tracemalloc.start()
+    try:
+        case.run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    durations.sort()
+    return {"case": case.name,
+            "iterations": iterations,
+            "mean": sum(durations) / iterations * 1000,
+            "p50": percentile(durations, 50) * 1000,
+            "p90": percentile(durations, 90) * 1000,
+            "p99": percentile(durations, 99) * 1000,
+            "max": durations[-1] * 1000,
+            "throughput": iterations / sum(durations),
+            "peak_memory": peak,
+            }
+
+
+class Command(BaseCommand):
+    help = "Measures the rendering and caching paths of the plots."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+                "cases", nargs="*", metavar="case",
+                help="Names of the cases to run, all of them by default: " +
+                     ", ".join(case.name for case in CASES) + ".")
+        parser.add_argument(
+                "--iterations", type=int, default=20,
+                help="Number of timed runs of every case.")
+        parser.add_argument(
+                "--warmup", type=int, default=2,
+                help="Number of runs of every case before timing it.")
+        parser.add_argument(
+                "--json", metavar="path",
+                help="Writes the results to a JSON file too.")
+
+    def get_cases(self, names):
+        available = {case.name: case for case in CASES}
+        unknown = set(names) - set(available)
+        if unknown:
+            raise CommandError("Unknown cases: " + ", ".join(sorted(unknown)))
+        return [case() for case in CASES if not names or case.name in names]
+
+    def get_environment(self):
+        return {"plottings": plottings.__version__,
+                "django": django.get_version(),
+                "matplotlib": matplotlib.__version__,
+                "python": platform.python_version(),
+                "cache": caches["default"].__class__.__name__,
+                }
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1:
+            raise CommandError("At least one iteration is required")
+        cases = self.get_cases(options["cases"])
+        environment = self.get_environment()
+        self.stdout.write(", ".join(f"{key} {value}"
+                                    for key, value in environment.items()))
+        self.stdout.write(f"{'case':<14} {'mean':>8} {'p50':>8} {'p90':>8} "
+                          f"{'p99':>8} {'ops/s':>8} {'peak KiB':>9}")
+        results = []
+        for case in cases:
+            result = measure(case, options["iterations"], options["warmup"])
+            results.append(result)
+            self.stdout.write(
+                    f"{result['case']:<14} {result['mean']:>8.2f} "
+                    f"{result['p50']:>8.2f} {result['p90']:>8.2f} "
+                    f"{result['p99']:>8.2f} {result['throughput']:>8.1f} "
+                    f"{result['peak_memory'] / 1024:>9.1f}")
+        if options["json"]:
+            with open(options["json"], "w") as output:
+                json.dump({"environment": environment, "results": results},
+                          output, indent=2)
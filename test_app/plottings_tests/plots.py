@@ -1,3 +1,4 @@
+import threading
 import numpy as np
 import matplotlib as mpl
 from matplotlib import pyplot as plt
@@ -6,6 +7,16 @@ mpl.use('Agg')
 
 def activity_plot(data, xticks=None, yticks=None):
     fig, ax = plt.subplots(figsize=(8, 1.5))
+    return draw_activity(fig, ax, data, xticks, yticks)
+
+
+def activity_figure(data, figure, xticks=None, yticks=None):
+    figure.set_size_inches(8, 1.5)
+    ax = figure.subplots()
+    return draw_activity(figure, ax, data, xticks, yticks)
+
+
+def draw_activity(fig, ax, data, xticks, yticks):
     ax.pcolormesh(data, vmin=0, vmax=5, cmap="Blues", edgecolors="white")
     ax.set_xticks(np.arange(len(xticks)), labels=xticks)
     ax.set_yticks(np.arange(len(yticks)), labels=yticks)
@@ -20,3 +31,27 @@ def activity_plot(data, xticks=None, yticks=None):
     ax.yaxis.set_ticks_position("right")
     fig.tight_layout()
     return fig
+
+
+RENDERS = []
+
+
+def line_figure(data, figure, color="blue"):
+    """
+    Small plot used by the tests, the thread of every render is appended to
+    ``RENDERS`` so they can be counted.
+    """
+    RENDERS.append(threading.get_ident())
+    figure.subplots().plot(data, color=color)
+
+
+class LinePlotMixin:
+    """
+    Mixin of the plots of the tests, drawn by ``line_figure()`` without
+    pyplot in a one inch figure.
+    """
+    use_pyplot = False
+    plotter_function = staticmethod(line_figure)
+
+    def get_figure_options(self):
+        return {"figsize": (1, 1)}
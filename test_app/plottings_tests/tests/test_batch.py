@@ -0,0 +1,93 @@
+import threading
+from base64 import b64decode
+from unittest.mock import patch
+from django.core.cache import caches
+from django.test import TestCase
+from plottings import (
+        SVGPlotToValue,
+        CachedSVGPlotToValue,
+        CachedPNGBase64PlotToValue,
+        )
+from plottings.batch import get_images, get_values
+from plottings_tests.plots import RENDERS, LinePlotMixin
+
+
+class BatchMixin(LinePlotMixin):
+    def __init__(self, data):
+        self.data = data
+
+    def get_plot_data(self):
+        return self.data
+
+
+class SVGPlot(BatchMixin, CachedSVGPlotToValue):
+    pass
+
+
+class PNGPlot(BatchMixin, CachedPNGBase64PlotToValue):
+    pass
+
+
+class UncachedPlot(BatchMixin, SVGPlotToValue):
+    pass
+
+
+class BatchTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        caches["default"].clear()
+        RENDERS.clear()
+        self.renders = RENDERS
+        self.svg_class = SVGPlot
+        self.png_class = PNGPlot
+        self.uncached_class = UncachedPlot
+
+    def test_values_in_order(self):
+        plots = [self.svg_class([1, 2]), self.png_class([2, 1]),
+                 self.uncached_class([3, 1])]
+        values = get_values(plots)
+        self.assertTrue(values[0].startswith("<?xml"))
+        self.assertTrue(b64decode(values[1]).startswith(b"\x89PNG"))
+        self.assertTrue(values[2].startswith("<?xml"))
+        self.assertEqual(values[0], self.svg_class([1, 2]).get_value())
+        self.assertEqual(len(self.renders), 3)
+
+    def test_cached(self):
+        plots = [self.svg_class([index, 1]) for index in range(4)]
+        get_images(plots)
+        self.assertEqual(len(self.renders), 4)
+        cache = caches["default"]
+        with patch.object(cache, "get_many", wraps=cache.get_many) as \
+                get_many:
+            images = get_images([self.svg_class([index, 1])
+                                 for index in range(5)])
+        self.assertEqual(get_many.call_count, 1)
+        self.assertEqual(len(self.renders), 5)
+        self.assertTrue(all(image.getvalue().startswith("<?xml")
+                            for image in images))
+        self.assertIsNone(cache.get(plots[0].get_cache_key() + ":lock"))
+
+    def test_duplicates(self):
+        images = get_images([self.png_class([1, 2]) for _ in range(3)])
+        self.assertEqual(len(self.renders), 1)
+        self.assertEqual(len({image.getvalue() for image in images}), 1)
+
+    def test_threads(self):
+        plots = [self.svg_class([index, 1]) for index in range(8)]
+        get_images(plots, max_workers=4)
+        self.assertNotIn(threading.get_ident(), self.renders)
+
+    def test_pyplot_in_calling_thread(self):
+        def plotter(data):
+            import matplotlib.pyplot as plt
+            self.renders.append(threading.get_ident())
+            figure, ax = plt.subplots()
+            ax.plot(data)
+            return figure
+
+        class PyplotPlot(SVGPlot):
+            use_pyplot = True
+            plotter_function = staticmethod(plotter)
+
+        get_images([PyplotPlot([index, 1]) for index in range(2)])
+        self.assertEqual(self.renders, [threading.get_ident()] * 2)
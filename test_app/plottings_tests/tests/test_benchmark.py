@@ -0,0 +1,41 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from plottings_tests.management.commands.benchmark_plots import percentile
+
+
+class BenchmarkTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        caches["default"].clear()
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([3], 90), 3)
+
+    def test_command(self):
+        output = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.json")
+            call_command("benchmark_plots", "cache-hit", "view-response",
+                         iterations=2, warmup=0, json=path, stdout=output)
+            with open(path) as results_file:
+                results = json.load(results_file)
+        self.assertEqual([result["case"] for result in results["results"]],
+                         ["cache-hit", "view-response"])
+        result = results["results"][0]
+        self.assertLessEqual(result["p50"], result["p99"])
+        self.assertGreater(result["throughput"], 0)
+        self.assertGreater(result["peak_memory"], 0)
+        self.assertIn("view-response", output.getvalue())
+
+    def test_unknown_case(self):
+        with self.assertRaises(CommandError):
+            call_command("benchmark_plots", "unknown", stdout=StringIO())
@@ -2,8 +2,15 @@ import os
 from typing import Any
 from contextlib import contextmanager
 from unittest.mock import patch, MagicMock
-from django.test import TestCase
+from matplotlib.figure import Figure
+from django.test import TestCase, override_settings
 from plottings.base import BasePlot
+from plottings.cache import (
+        LocalCache,
+        get_local_cache,
+        pack_image,
+        unpack_image,
+        )
 from plottings import (
         CachedPNGPlotView,
         CachedSVGZPlotView,
@@ -29,6 +36,8 @@ class CacheTestMixin:
 
     def setUp(self):
         class Mock(self.tclass):
+            png_optimize = False
+
             def __init__(self2, *args, **kwargs):
                 super().__init__(*args, **kwargs)
                 self.counter = 0
@@ -38,6 +47,7 @@ class CacheTestMixin:
 
             @contextmanager
             def _get_figure(self2):
+                self.renders += 1
                 yield MockFigure(self.outputs[self.counter])
 
             def get_image(self2):
@@ -46,6 +56,7 @@ class CacheTestMixin:
                 return image
 
         self._cache = {}
+        self.renders = 0
 
         def get(key, default=None):
             return self._cache.get(key, default)
@@ -53,9 +64,26 @@ class CacheTestMixin:
         def _set(key, value, timeout=60):
             self._cache[key] = value
 
+        def add(key, value, timeout=60):
+            if key in self._cache:
+                return False
+            self._cache[key] = value
+            return True
+
+        def delete(key):
+            return self._cache.pop(key, None) is not None
+
+        def get_many(keys):
+            return {key: self._cache[key] for key in keys
+                    if key in self._cache}
+
         cache = MagicMock()
         cache.get = get
+        cache.get_many = get_many
         cache.set = _set
+        cache.add = add
+        cache.delete = delete
+        cache.default_timeout = 300
 
         self.patcher = patch("plottings.base.caches")
         self.caches_mock = self.patcher.start()
@@ -63,15 +91,130 @@ class CacheTestMixin:
 
         self.plot = Mock()
 
+    def cached_value(self, key):
+        return unpack_image(self._cache[key])[0]
+
+    def cached_metadata(self, key):
+        return unpack_image(self._cache[key])[1]
+
     def test_uno(self):
         image1 = self.plot.get_image()
         self.assertEqual(self.outputs[0], image1.getvalue())
-        self.assertEqual(self._cache[1], self.outputs[0])
+        self.assertEqual(self.cached_value(1), self.outputs[0])
         image2 = self.plot.get_image()
         self.assertEqual(self.outputs[1], image2.getvalue())
         image3 = self.plot.get_image()
         self.assertEqual(self.outputs[2], image3.getvalue())
-        self.assertEqual(self._cache[2], self.outputs[2])
+        self.assertEqual(self.cached_value(2), self.outputs[2])
+        self.assertEqual(self.renders, 2)
+        self.assertNotIn("1:lock", self._cache)
+
+    def test_image_metadata(self):
+        self.assertIsNone(self.plot.get_image_metadata())
+        self.plot.get_image()
+        metadata = self.plot.get_image_metadata()
+        self.assertEqual(metadata["size"], len(self.outputs[0]))
+        self.assertEqual(metadata["format"], self.plot.get_filetype())
+        self._cache.pop(1)
+        self.assertIsNone(self.plot.get_image_metadata())
+
+    def test_envelope_version(self):
+        self.plot.get_image()
+        version, metadata, value = self._cache[1]
+        self._cache[1] = ("0:0.0.0", metadata, value)
+        self.cache_keys = [1, 1, 1]
+        self.plot.get_image()
+        self.assertEqual(self.renders, 2)
+        self.assertEqual(self._cache[1][0], version)
+
+    @override_settings(PLOTTINGS_LOCAL_CACHE_SIZE=1000)
+    def test_local_cache(self):
+        self.plot.local_cache = True
+        self.plot.get_image()
+        self._cache.clear()
+        image = self.plot.get_image()
+        self.assertEqual(self.outputs[0], image.getvalue())
+        self.assertEqual(self.renders, 1)
+        stats = get_local_cache("default").stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["entries"], 1)
+
+    def test_wait_for_lock(self):
+        self._cache["1:lock"] = 1
+
+        def sleep(seconds):
+            self._cache[1] = pack_image(self.outputs[2])
+
+        with patch("plottings.base.time.sleep", sleep):
+            image = self.plot.get_image()
+        self.assertEqual(self.outputs[2], image.getvalue())
+        self.assertEqual(self.renders, 0)
+
+    def test_lock_wait_expired(self):
+        self._cache["1:lock"] = 1
+        self.plot.cache_lock_wait = 0
+        image = self.plot.get_image()
+        self.assertEqual(self.outputs[0], image.getvalue())
+        self.assertEqual(self.renders, 1)
+
+    def test_early_refresh(self):
+        self.plot.cache_timeout = 60
+        self.plot.cache_early_refresh = 10 ** 12
+        self.plot.get_image()
+        self.assertIn("created", self.cached_metadata(1))
+        self.plot.get_image()
+        self.assertEqual(self.renders, 2)
+
+    def test_early_refresh_locked(self):
+        self.plot.cache_timeout = 60
+        self.plot.cache_early_refresh = 10 ** 12
+        self.plot.get_image()
+        self._cache["1:lock"] = 1
+        image = self.plot.get_image()
+        self.assertEqual(self.outputs[0], image.getvalue())
+        self.assertEqual(self.renders, 1)
+
+    def test_stale_while_revalidate(self):
+        self.plot.use_pyplot = False
+        self.plot.cache_timeout = 60
+        self.plot.cache_soft_timeout = 10
+        self.plot.get_image()
+        save = self.plot.get_timings()["save"]
+        self.cached_metadata(1)["created"] -= 20
+        self.cache_keys = [1, 1, 1]
+        executor = MagicMock()
+        executor.submit = lambda function, *args: function(*args)
+        with patch("plottings.base.get_refresh_executor",
+                   return_value=executor):
+            image = self.plot.get_image()
+        self.assertEqual(self.outputs[0], image.getvalue())
+        self.assertEqual(self.renders, 2)
+        self.assertEqual(self.cached_value(1), self.outputs[1])
+        self.assertNotIn("1:lock", self._cache)
+        self.assertEqual(self.plot.get_timings()["save"], save)
+
+    def test_stale_pyplot_refreshed_inline(self):
+        self.plot.use_pyplot = True
+        self.plot.cache_timeout = 60
+        self.plot.cache_soft_timeout = 10
+        self.plot.get_image()
+        self.cached_metadata(1)["created"] -= 20
+        self.cache_keys = [1, 1, 1]
+        with patch("plottings.base.get_refresh_executor") as executor:
+            image = self.plot.get_image()
+        executor.assert_not_called()
+        self.assertEqual(self.outputs[1], image.getvalue())
+        self.assertEqual(self.renders, 2)
+        self.assertIn("save", self.plot.get_timings())
+
+    def test_fresh_within_soft_timeout(self):
+        self.plot.cache_timeout = 60
+        self.plot.cache_soft_timeout = 10
+        self.plot.get_image()
+        with patch("plottings.base.get_refresh_executor") as executor:
+            self.plot.get_image()
+        executor.assert_not_called()
+        self.assertEqual(self.renders, 1)
 
     def tearDown(self):
         self.patcher.stop()
@@ -92,3 +235,104 @@ class SVGPlotToValueTestCase(CacheTestMixin, TestCase):
 
 class PNGBase64PlotToValueTestCase(CacheTestMixin, TestCase):
     tclass = CachedPNGBase64PlotToValue
+
+
+def plotter(data, color="blue"):
+    return Figure()
+
+
+class DefaultCacheKeyTestCase(TestCase):
+    def setUp(self):
+        self.calls = 0
+
+        class Mock(CachedPNGPlotView):
+            plotter_function = staticmethod(plotter)
+
+            def __init__(self2, data, color):
+                self2.data = data
+                self2.color = color
+
+            def get_plot_data(self2):
+                self.calls += 1
+                return self2.data
+
+            def get_plot_options(self2):
+                return {"color": self2.color}
+
+        self.tclass = Mock
+
+    def test_cache_key(self):
+        plot = self.tclass([1, 2], "red")
+        key = plot.get_cache_key()
+        self.assertTrue(key.startswith("plottings:"))
+        self.assertEqual(key, self.tclass([1, 2], "red").get_cache_key())
+        self.assertNotEqual(key, self.tclass([1, 3], "red").get_cache_key())
+        self.assertNotEqual(key, self.tclass([1, 2], "blue").get_cache_key())
+
+    def test_cache_key_per_class(self):
+        class Optimized(self.tclass):
+            png_optimize = True
+
+        key = self.tclass([1, 2], "red").get_cache_key()
+        self.assertNotEqual(key, Optimized([1, 2], "red").get_cache_key())
+
+    def test_unhashable_data(self):
+        with self.assertRaises(TypeError):
+            self.tclass(object(), "red").get_cache_key()
+
+    def test_plot_data_loaded_once(self):
+        plot = self.tclass([1, 2], "red")
+        plot.get_cache_key()
+        with plot._get_figure():
+            pass
+        self.assertEqual(self.calls, 1)
+
+    def test_data_fingerprint(self):
+        plot = self.tclass([1, 2], "red")
+        plot.get_data_fingerprint = lambda: (2, "2024-06-12")
+        key = plot.get_cache_key()
+        self.assertEqual(self.calls, 0)
+        other = self.tclass([1, 3], "red")
+        other.get_data_fingerprint = lambda: (2, "2024-06-13")
+        self.assertNotEqual(key, other.get_cache_key())
+        self.assertNotEqual(key, self.tclass([1, 2], "red").get_cache_key())
+        with plot._get_figure():
+            pass
+        self.assertEqual(self.calls, 2)
+
+
+class LocalCacheTestCase(TestCase):
+    def setUp(self):
+        self.cache = LocalCache(10, 60)
+
+    def test_get_set(self):
+        envelope = pack_image(b"1234")
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.set("a", envelope)
+        self.assertIs(self.cache.get("a"), envelope)
+        self.assertEqual(self.cache.stats(), {"entries": 1, "size": 4,
+                                              "hits": 1, "misses": 1})
+        self.cache.delete("a")
+        self.assertIsNone(self.cache.get("a"))
+
+    def test_eviction(self):
+        self.cache.set("a", pack_image(b"1234"))
+        self.cache.set("b", pack_image(b"1234"))
+        self.cache.get("a")
+        self.cache.set("c", pack_image(b"1234"))
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNotNone(self.cache.get("c"))
+        self.cache.set("d", pack_image(b"12345678901"))
+        self.assertIsNone(self.cache.get("d"))
+        self.assertEqual(self.cache.stats()["size"], 8)
+
+    def test_timeout(self):
+        self.cache.set("a", pack_image(b"1234"), 0)
+        self.assertIsNone(self.cache.get("a"))
+        with patch("plottings.cache.time.monotonic", return_value=0):
+            self.cache.set("b", pack_image(b"1234"), 120)
+        with patch("plottings.cache.time.monotonic", return_value=59):
+            self.assertIsNotNone(self.cache.get("b"))
+        with patch("plottings.cache.time.monotonic", return_value=61):
+            self.assertIsNone(self.cache.get("b"))
@@ -0,0 +1,116 @@
+from unittest import TestCase, skipUnless
+import numpy as np
+from django.test import TestCase as DjangoTestCase
+from plottings.hashing import fingerprint
+from plottings_tests.models import Plot
+
+try:
+    import pandas as pd
+except ImportError:  # pragma: no cover
+    pd = None
+
+
+class FingerprintTestCase(TestCase):
+    def test_values(self):
+        self.assertEqual(fingerprint([1, "a", None]),
+                         fingerprint([1, "a", None]))
+        self.assertNotEqual(fingerprint(1), fingerprint("1"))
+        self.assertNotEqual(fingerprint(1), fingerprint(1.0))
+        self.assertNotEqual(fingerprint([1, 2]), fingerprint((1, 2)))
+        self.assertNotEqual(fingerprint(["ab"]), fingerprint(["a", "b"]))
+
+    def test_dicts(self):
+        self.assertEqual(fingerprint({"a": 1, "b": [2]}),
+                         fingerprint({"b": [2], "a": 1}))
+        self.assertNotEqual(fingerprint({"a": 1}), fingerprint({"a": 2}))
+        self.assertEqual(fingerprint({1, 2, 3}), fingerprint({3, 2, 1}))
+
+    def test_arrays(self):
+        data = np.arange(12, dtype=np.uint8).reshape(3, 4)
+        self.assertEqual(fingerprint(data), fingerprint(data.copy()))
+        self.assertNotEqual(fingerprint(data), fingerprint(data.reshape(4, 3)))
+        self.assertNotEqual(fingerprint(data),
+                            fingerprint(data.astype(np.uint16)))
+        self.assertEqual(fingerprint(data.T), fingerprint(data.T.copy()))
+        changed = data.copy()
+        changed[2, 3] = 0
+        self.assertNotEqual(fingerprint(data), fingerprint(changed))
+        self.assertEqual(fingerprint(np.array(["a", None], dtype=object)),
+                         fingerprint(np.array(["a", None], dtype=object)))
+        self.assertEqual(fingerprint(np.float64(1.5)),
+                         fingerprint(np.float64(1.5)))
+
+    def test_functions(self):
+        self.assertEqual(fingerprint(np.mean), fingerprint(np.mean))
+        self.assertNotEqual(fingerprint(np.mean), fingerprint(np.median))
+        self.assertEqual(fingerprint(FingerprintTestCase),
+                         fingerprint(FingerprintTestCase))
+
+    def test_default_repr(self):
+        with self.assertRaises(TypeError):
+            fingerprint(object())
+        with self.assertRaises(TypeError):
+            fingerprint({"data": [Opaque()]})
+
+
+@skipUnless(pd, "pandas is not installed")
+class PandasFingerprintTestCase(TestCase):
+    def setUp(self):
+        self.frame = pd.DataFrame({"a": [1, 2, 3], "b": [0.5, 1.5, 2.5]})
+
+    def test_data_frames(self):
+        frame = self.frame
+        self.assertEqual(fingerprint(frame), fingerprint(frame.copy()))
+        changed = frame.copy()
+        changed.loc[2, "b"] = 0
+        self.assertNotEqual(fingerprint(frame), fingerprint(changed))
+        self.assertNotEqual(fingerprint(frame),
+                            fingerprint(frame.rename(columns={"b": "c"})))
+        self.assertNotEqual(fingerprint(frame),
+                            fingerprint(frame.astype({"a": "int32"})))
+
+    def test_series(self):
+        series = self.frame["b"]
+        self.assertEqual(fingerprint(series), fingerprint(series.copy()))
+        changed = series.copy()
+        changed[2] = 0
+        self.assertNotEqual(fingerprint(series), fingerprint(changed))
+        self.assertNotEqual(fingerprint(series),
+                            fingerprint(series.rename("c")))
+        self.assertNotEqual(fingerprint(series),
+                            fingerprint(series.astype("float32")))
+
+    def test_indexes(self):
+        index = pd.Index([1, 2, 3], name="a")
+        self.assertEqual(fingerprint(index),
+                         fingerprint(pd.Index([1, 2, 3], name="a")))
+        self.assertNotEqual(fingerprint(index),
+                            fingerprint(pd.Index([1, 2, 4], name="a")))
+        self.assertNotEqual(fingerprint(index),
+                            fingerprint(index.rename("b")))
+        self.assertNotEqual(fingerprint(index),
+                            fingerprint(index.astype("int32")))
+
+
+class Opaque:
+    pass
+
+
+class DjangoFingerprintTestCase(DjangoTestCase):
+    def test_model_instances(self):
+        plot = Plot(id=1, plot="plots/a.png")
+        self.assertEqual(fingerprint(plot),
+                         fingerprint(Plot(id=1, plot="plots/a.png")))
+        self.assertNotEqual(fingerprint(plot),
+                            fingerprint(Plot(id=1, plot="plots/b.png")))
+
+    def test_querysets(self):
+        for index in range(25):
+            Plot.objects.create(plot=f"plots/{index}.png")
+        queryset = Plot.objects.order_by("id")
+        before = fingerprint(queryset)
+        self.assertEqual(before, fingerprint(Plot.objects.order_by("id")))
+        last = queryset.last()
+        last.plot = "plots/changed.png"
+        last.save()
+        self.assertNotEqual(before, fingerprint(Plot.objects.order_by("id")))
@@ -0,0 +1,103 @@
+import os
+import time
+import tempfile
+from concurrent.futures.process import BrokenProcessPool
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from plottings import PNGPlotToFile
+from plottings.executors import get_job_executor
+from plottings.jobs import JobBackend, enqueue, get_job_status
+from plottings_tests.plots import LinePlotMixin
+
+
+class JobPlot(LinePlotMixin, PNGPlotToFile):
+    upload_to = "plots"
+
+    def __init__(self, size, name="job"):
+        self.size = size
+        self.filename = name
+
+    def get_plot_data(self):
+        if self.size < 0:
+            raise ValueError("Negative size")
+        return list(range(self.size))
+
+
+class UnavailableJobBackend(JobBackend):
+    job_ids = []
+
+    def submit(self, job_id, path, args, kwargs):
+        self.job_ids.append(job_id)
+        raise ConnectionError("Broker unavailable")
+
+
+class JobTestMixin:
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.TemporaryDirectory()
+        self.settings = override_settings(MEDIA_ROOT=self.media.name,
+                                          **self.job_settings)
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        self.media.cleanup()
+        super().tearDown()
+
+    def wait(self, job_id):
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            status = get_job_status(job_id)
+            if status["status"] in ("done", "failed"):
+                return status
+            time.sleep(0.05)
+        self.fail("Job not finished")
+
+    def test_job(self):
+        job_id = enqueue(JobPlot, 3, name="report")
+        status = self.wait(job_id)
+        self.assertEqual(status["status"], "done")
+        self.assertTrue(status["name"].startswith("plots/report"))
+        with default_storage.open(status["name"]) as f:
+            self.assertTrue(f.read().startswith(b"\x89PNG"))
+
+    def test_failed_job(self):
+        status = self.wait(enqueue(JobPlot, -1))
+        self.assertEqual(status["status"], "failed")
+        self.assertIn("Negative size", status["error"])
+
+    def test_not_a_file_plot(self):
+        status = self.wait(enqueue("plottings.PNGPlotView"))
+        self.assertEqual(status["status"], "failed")
+
+
+class ImmediateJobTestCase(JobTestMixin, TestCase):
+    job_settings = {
+            "PLOTTINGS_JOB_BACKEND": "plottings.jobs.ImmediateJobBackend"}
+
+
+class ProcessJobTestCase(JobTestMixin, TestCase):
+    job_settings = {"PLOTTINGS_JOB_PROCESSES": 1}
+
+    def test_unknown_job(self):
+        self.assertIsNone(get_job_status("unknown"))
+
+    def test_broken_pool(self):
+        executor = get_job_executor()
+        with self.assertRaises(BrokenProcessPool):
+            executor.submit(os._exit, 1).result()
+        status = self.wait(enqueue(JobPlot, 3))
+        self.assertEqual(status["status"], "done")
+        self.assertIsNot(get_job_executor(), executor)
+
+
+@override_settings(
+        PLOTTINGS_JOB_BACKEND=f"{__name__}.UnavailableJobBackend")
+class FailedSubmitTestCase(TestCase):
+    def test_failed_submit(self):
+        UnavailableJobBackend.job_ids = []
+        with self.assertRaises(ConnectionError):
+            enqueue(JobPlot, 3)
+        [job_id] = UnavailableJobBackend.job_ids
+        self.assertEqual(get_job_status(job_id),
+                         {"status": "failed", "error": "Broker unavailable"})
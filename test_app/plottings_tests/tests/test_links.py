@@ -0,0 +1,112 @@
+from django.core import signing
+from django.core.cache import caches
+from django.template import Context, Template
+from django.test import TestCase, Client
+from django.test.client import RequestFactory
+from plottings import (
+        CachedPNGBase64PlotToValue,
+        CachedSVGPlotToValue,
+        SVGPlotToValue,
+        )
+from plottings.links import (
+        PlotURL,
+        get_plot_token,
+        get_plot_url,
+        load_plot_token,
+        )
+from plottings.views import PlotLinkView
+from plottings_tests.plots import RENDERS, LinePlotMixin
+
+
+class LinkedPlot(LinePlotMixin, CachedPNGBase64PlotToValue):
+    def __init__(self, size, color="blue"):
+        self.size = size
+        self.color = color
+
+    def get_plot_data(self):
+        return list(range(self.size))
+
+    def get_plot_options(self):
+        return {"color": self.color}
+
+
+class LinkedSVGPlot(LinePlotMixin, SVGPlotToValue):
+    def __init__(self, size, start=0):
+        self.size = size
+        self.start = start
+
+    def get_plot_data(self):
+        return list(range(self.start, self.start + self.size))
+
+
+class CachedLinkedSVGPlot(LinkedSVGPlot, CachedSVGPlotToValue):
+    pass
+
+
+class LinksTestCase(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        RENDERS.clear()
+
+    def test_token(self):
+        token = get_plot_token(LinkedPlot, 3, color="red")
+        plot = load_plot_token(token)
+        self.assertIsInstance(plot, LinkedPlot)
+        self.assertEqual((plot.size, plot.color), (3, "red"))
+        with self.assertRaises(signing.BadSignature):
+            load_plot_token(token[:-2])
+        token = get_plot_token("plottings.views.PlotLinkView")
+        with self.assertRaises(ValueError):
+            load_plot_token(token)
+
+    def test_url_renders_on_request(self):
+        url = get_plot_url(LinkedPlot, 3)
+        self.assertTrue(url.startswith("/plots/"))
+        self.assertEqual(RENDERS, [])
+        response = Client().get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Content-Type"], "image/png")
+        self.assertTrue(response.content.startswith(b"\x89PNG"))
+        etag = response.headers["ETag"]
+        response = Client().get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(RENDERS), 1)
+
+    def test_svg(self):
+        response = Client().get(get_plot_url(LinkedSVGPlot, 2))
+        self.assertEqual(response.headers["Content-Type"], "image/svg+xml")
+        self.assertTrue(response.content.startswith(b"<?xml"))
+
+    def test_server_timing(self):
+        token = get_plot_token(LinkedPlot, 3)
+        view = PlotLinkView.as_view(server_timing=True)
+        response = view(RequestFactory().get("/"), token=token)
+        timing = response.headers["Server-Timing"]
+        self.assertTrue(timing.startswith('cache;desc="miss";dur='))
+        self.assertIn("plot;dur=", timing)
+
+    def test_svg_content_length(self):
+        for plot_class in (LinkedSVGPlot, CachedLinkedSVGPlot):
+            url = get_plot_url(plot_class, 4, start=-2)
+            response = Client().get(url)
+            self.assertIn("\u2212".encode(), response.content)
+            self.assertEqual(int(response.headers["Content-Length"]),
+                             len(response.content))
+            response = Client().head(url)
+            self.assertEqual(int(response.headers["Content-Length"]),
+                             len(Client().get(url).content))
+
+    def test_invalid_token(self):
+        response = Client().get("/plots/invalid")
+        self.assertEqual(response.status_code, 404)
+
+    def test_template(self):
+        template = Template('{% load plottings %}'
+                            '{% plot_url path 3 color="red" %}|{{ value }}')
+        value = PlotURL(LinkedPlot, 3, color="red")
+        path = "plottings_tests.tests.test_links.LinkedPlot"
+        output = template.render(Context({"path": path, "value": value}))
+        first, second = output.split("|")
+        self.assertEqual(first, second)
+        self.assertEqual(first, get_plot_url(LinkedPlot, 3, color="red"))
+        self.assertEqual(RENDERS, [])
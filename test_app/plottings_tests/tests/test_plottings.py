@@ -1,9 +1,17 @@
+import os
 from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from base64 import b64decode
 from unittest import TestCase
 from unittest.mock import Mock, MagicMock
+import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from django.template import Context, Template
+from django.test import override_settings
 from plottings.base import BasePlot
+from plottings.executors import get_render_executor, shutdown_render_executor
 from plottings import (
         PNGPlotView,
         SVGZPlotView,
@@ -11,7 +19,9 @@ from plottings import (
         PNGBase64PlotToValue,
         SVGZPlotToFile,
         PNGPlotToFile,
+        LazyPlotValue,
         )
+from plottings_tests.plots import LinePlotMixin, line_figure
 
 
 PLOT_DATA = [1, 2, 3, 4]
@@ -81,6 +91,62 @@ class PNGPlotToFilePlotterTestCase(BinaryPlotterMixin, TestCase):
     tclass = PNGPlotToFile
 
 
+# TEST pyplot free figure
+
+class BaseFigureMixin:
+    tclass = BasePlot
+    magic: Any = b""
+
+    def setUp(self):
+        super().setUp()
+        self.figures = []
+
+        def plotter(data, figure=None):
+            self.figures.append(figure)
+            line_figure(data, figure)
+
+        class MockPlot(LinePlotMixin, self.tclass):
+            plotter_function = staticmethod(plotter)
+
+            def get_plot_data(self2):
+                return PLOT_DATA
+
+        self.plot = MockPlot()
+
+    def test_figure(self):
+        with self.plot._get_figure() as figure:
+            self.assertIsInstance(figure, Figure)
+            self.assertEqual(list(figure.get_size_inches()), [1, 1])
+        self.assertEqual(len(plt.get_fignums()), 0)
+
+    def test_threads(self):
+        with ThreadPoolExecutor(4) as executor:
+            futures = [executor.submit(self.plot.get_image) for _ in range(8)]
+            images = [future.result().getvalue() for future in futures]
+        for image in images:
+            self.assertTrue(image.startswith(self.magic))
+        self.assertEqual(len(set(map(id, self.figures))), 8)
+        self.assertEqual(len(plt.get_fignums()), 0)
+
+
+class SVGPlotToValueFigureTestCase(BaseFigureMixin, TestCase):
+    tclass = SVGPlotToValue
+    magic = "<?xml"
+
+    def test_minify(self):
+        document = self.plot.get_image().getvalue()
+        self.plot.svg_minify = True
+        minified = self.plot.get_image().getvalue()
+        self.assertIn("<metadata>", document)
+        self.assertNotIn("<metadata>", minified)
+        self.assertLess(len(minified), len(document))
+
+
+class PNGPlotViewFigureTestCase(BaseFigureMixin, TestCase):
+    tclass = PNGPlotView
+    magic = b"\x89PNG"
+
+
 # TEST Image
 
 class BaseImageMixin:
@@ -223,6 +289,80 @@ class PNGPlotToFilePILTestCase(BinaryPILMixin, TestCase):
     output = PLOT_BINARY
 
 
+# TEST Executor
+
+def square_plot(data, color="blue"):
+    fig, ax = plt.subplots(figsize=(1, 1))
+    ax.plot(data, color=color)
+    return fig
+
+
+class BaseExecutorMixin:
+    tclass = BasePlot
+    magic: Any = b""
+
+    def setUp(self):
+        super().setUp()
+
+        class MockPlot(self.tclass):
+            plotter_function = staticmethod(square_plot)
+
+            def get_plot_data(self2):
+                return np.arange(4)
+
+            def get_plot_options(self2):
+                return {"color": "red"}
+
+        self.plot = MockPlot()
+
+    def tearDown(self):
+        shutdown_render_executor()
+        super().tearDown()
+
+    def test_inline_by_default(self):
+        self.assertIsNone(get_render_executor())
+
+    @override_settings(PLOTTINGS_RENDER_PROCESSES=1)
+    def test_render_in_executor(self):
+        self.assertIsNotNone(self.plot.get_render_executor())
+        image_buffer = self.plot.get_image()
+        self.assertIsInstance(image_buffer, self.plot.buffer_class)
+        self.assertTrue(image_buffer.getvalue().startswith(self.magic))
+        self.assertEqual(len(plt.get_fignums()), 0)
+
+    @override_settings(PLOTTINGS_RENDER_PROCESSES=1)
+    def test_broken_executor(self):
+        executor = get_render_executor()
+        with self.assertRaises(BrokenProcessPool):
+            executor.submit(os._exit, 1).result()
+        image_buffer = self.plot.get_image()
+        self.assertTrue(image_buffer.getvalue().startswith(self.magic))
+        self.assertIsNot(get_render_executor(), executor)
+
+
+class SVGPlotToValueExecutorTestCase(BaseExecutorMixin, TestCase):
+    tclass = SVGPlotToValue
+    magic = "<?xml"
+
+
+class PNGPlotViewExecutorTestCase(BaseExecutorMixin, TestCase):
+    tclass = PNGPlotView
+    magic = b"\x89PNG"
+
+    def test_optimize_off_by_default(self):
+        self.assertIsNone(self.plot.get_render_processor())
+        self.assertNotEqual(self.plot.get_image().getvalue()[25], 3)
+
+    @override_settings(PLOTTINGS_RENDER_PROCESSES=1)
+    def test_optimize_in_executor(self):
+        self.plot.png_optimize = True
+        self.assertIsNotNone(self.plot.get_render_processor())
+        self.plot.process_image = Mock(side_effect=lambda buffer: buffer)
+        value = self.plot.get_image().getvalue()
+        # Byte 25 is the color type of the IHDR chunk, 3 is a palette.
+        self.assertEqual(value[25], 3)
+
+
 # TEST Explotation
 
 
@@ -235,9 +375,11 @@ class BaseValueMixin:
 
     def setUp(self):
         super().setUp()
+        self.renders = 0
 
         class MockPlot(self.tclass):
             def get_image(self2):
+                self.renders += 1
                 self.buffer = self2.buffer_class()
                 self.buffer.write(self.output)
                 self.buffer.seek(0)
@@ -252,6 +394,32 @@ class BaseValueMixin:
         value = self.get_value()
         assert value, self.output
 
+    def test_rendered_once(self):
+        template = Template("{% if plot %}{{ plot }}{% include inner %}"
+                            "{% endif %}")
+        inner = Template("{{ plot }}")
+        output = template.render(Context({"plot": self.plot,
+                                          "inner": inner}))
+        self.assertEqual(output, str(self.plot) * 2)
+        self.assertEqual(self.renders, 1)
+
+    def test_lazy_value(self):
+        built = []
+
+        def build():
+            built.append(1)
+            return self.plot
+
+        value = LazyPlotValue(build)
+        template = Template("{% if value %}{% endif %}")
+        template.render(Context({"value": value}))
+        self.assertEqual(built, [])
+        self.assertEqual(self.renders, 0)
+        template = Template("{{ value }}{{ value }}")
+        output = template.render(Context({"value": value}))
+        self.assertEqual(output, str(self.plot) * 2)
+        self.assertEqual((len(built), self.renders), (1, 1))
+
 
 class PNGPlotToBase64ValueTestCase(BaseValueMixin, TestCase):
     tclass = PNGBase64PlotToValue
@@ -305,3 +473,13 @@ class SVGZPlotToFileTestCase(BaseFileMixin, TestCase):
     tclass = SVGZPlotToFile
     filename = "filename.svgz"
     output = PLOT_BINARY
+
+
+class PublicNamesTestCase(TestCase):
+    def test_all(self):
+        import plottings
+        self.assertEqual(len(plottings.__all__), len(set(plottings.__all__)))
+        for name in plottings.__all__:
+            self.assertTrue(hasattr(plottings, name), name)
+        self.assertIn("AsyncPNGPlotView", plottings.__all__)
+        self.assertIn("CachedPNGPlotView", plottings.__all__)
@@ -0,0 +1,115 @@
+from io import BytesIO
+from unittest import TestCase
+import numpy as np
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+from plottings.processing import minify_svg, optimize_png
+
+
+def load(value):
+    image = Image.open(BytesIO(value))
+    image.load()
+    return image
+
+
+class OptimizePNGTestCase(TestCase):
+    def setUp(self):
+        pixels = np.full((40, 60, 4), 255, dtype=np.uint8)
+        pixels[10:20, 10:50, :3] = (200, 30, 30)
+        pixels[25:35, 5:15, :3] = (30, 30, 200)
+        self.pixels = pixels
+
+    def image(self, pixels):
+        return Image.fromarray(pixels, "RGBA")
+
+    def test_opaque_palette(self):
+        image = load(optimize_png(self.image(self.pixels)))
+        self.assertEqual(image.mode, "P")
+        self.assertEqual(np.asarray(image.convert("RGBA")).tolist(),
+                         self.pixels.tolist())
+
+    def test_transparency(self):
+        self.pixels[0, 0, 3] = 0
+        image = load(optimize_png(self.image(self.pixels)))
+        self.assertEqual(image.mode, "P")
+        self.assertEqual(np.asarray(image.convert("RGBA")).tolist(),
+                         self.pixels.tolist())
+
+    def test_many_colors(self):
+        values = np.random.default_rng(0).integers(0, 256, (40, 60, 3))
+        self.pixels[:, :, :3] = values
+        image = load(optimize_png(self.image(self.pixels)))
+        self.assertEqual(image.mode, "RGB")
+        self.assertEqual(np.asarray(image).tolist(),
+                         self.pixels[:, :, :3].tolist())
+
+    def test_quantize(self):
+        self.pixels[:, :, 0] = np.arange(60) * 4
+        image = load(optimize_png(self.image(self.pixels), max_colors=16))
+        self.assertEqual(image.mode, "RGB")
+        self.assertEqual(np.asarray(image).tolist(),
+                         self.pixels[:, :, :3].tolist())
+        image = load(optimize_png(self.image(self.pixels), max_colors=16,
+                                  quantize_colors=1024))
+        self.assertEqual(image.mode, "P")
+        self.assertLessEqual(len(image.getcolors()), 16)
+
+    def test_metadata(self):
+        info = PngInfo()
+        info.add_text("Software", "Matplotlib")
+        image_buffer = BytesIO()
+        self.image(self.pixels).save(image_buffer, format="png",
+                                     pnginfo=info, dpi=(100, 100))
+        image = load(image_buffer.getvalue())
+        stripped = load(optimize_png(image))
+        self.assertNotIn("Software", stripped.info)
+        self.assertEqual(stripped.info["dpi"], image.info["dpi"])
+        kept = load(optimize_png(image, strip_metadata=False))
+        self.assertEqual(kept.info["Software"], "Matplotlib")
+        self.assertIn("dpi", kept.info)
+
+
+SVG = """<?xml version="1.0" encoding="utf-8" standalone="no"?>
+<svg xmlns:xlink="http://www.w3.org/1999/xlink" width="460.8pt">
+ <metadata>
+  <dc:date>2024-01-01T00:00:00</dc:date>
+ </metadata>
+ <!-- comment -->
+ <defs>
+  <path id="m1" d="M 0 0 
+L 0 3.5 
+" style="stroke: #000000; stroke-width: 0.8"/>
+  <path id="m2" d="M 0 0 
+L 0 3.500001 
+" style="stroke: #000000; stroke-width: 0.8"/>
+ </defs>
+ <use xlink:href="#m1" x="73.832727" y="307.584"/>
+ <use xlink:href="#m2" x="-0.0001" y="1e-05"/>
+ <g transform="translate(70.651477 322.181656) scale(0.015625)"/>
+</svg>
+"""
+
+
+class MinifySVGTestCase(TestCase):
+    def test_minify(self):
+        document = minify_svg(SVG)
+        self.assertNotIn("metadata", document)
+        self.assertNotIn("comment", document)
+        self.assertNotIn("> <", document)
+        self.assertIn('d="M0 0L0 3.5"', document)
+        self.assertIn('style="stroke:#000000;stroke-width:0.8"', document)
+        self.assertIn('x="73.833"', document)
+        self.assertIn('x="0" y="0"', document)
+        self.assertIn("translate(70.651 322.182) scale(0.015625)", document)
+
+    def test_deduplicate_paths(self):
+        document = minify_svg(SVG)
+        self.assertNotIn('id="m2"', document)
+        self.assertNotIn("#m2", document)
+        self.assertEqual(document.count('xlink:href="#m1"'), 2)
+        document = minify_svg(SVG, precision=None)
+        self.assertIn('id="m2"', document)
+
+    def test_keep_metadata(self):
+        document = minify_svg(SVG, strip_metadata=False)
+        self.assertIn("<dc:date>", document)
@@ -0,0 +1,117 @@
+from io import StringIO
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from plottings import (
+        CachedPNGPlotView,
+        CachedSVGPlotToValue,
+        CachedSVGPlotView,
+        )
+from plottings.registry import (
+        build_plot,
+        get_registered_plots,
+        register,
+        unregister,
+        )
+from plottings_tests.plots import LinePlotMixin
+
+
+class WarmPlot(LinePlotMixin, CachedSVGPlotToValue):
+    def __init__(self, size):
+        self.size = size
+
+    @classmethod
+    def get_cache_warm_arguments(cls):
+        return [((size,), {}) for size in range(1, 4)]
+
+    def get_plot_data(self):
+        if self.size < 0:
+            raise ValueError("Negative size")
+        return list(range(self.size))
+
+
+class WarmView(LinePlotMixin, CachedPNGPlotView):
+    @classmethod
+    def get_cache_warm_arguments(cls):
+        return [((), {"size": 2})]
+
+    def get_plot_data(self):
+        return list(range(self.kwargs["size"]))
+
+
+class WarmSVGView(LinePlotMixin, CachedSVGPlotView):
+    content_codings = ["gzip", "identity"]
+
+    @classmethod
+    def get_cache_warm_arguments(cls):
+        return [((), {})]
+
+    def get_plot_data(self):
+        return [1, 2]
+
+
+class FailingPlot(WarmPlot):
+    @classmethod
+    def get_cache_warm_arguments(cls):
+        return [((-1,), {})]
+
+
+class RegistryTestCase(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        register(WarmPlot)
+        register(WarmView)
+
+    def tearDown(self):
+        unregister(WarmPlot)
+        unregister(WarmView)
+        unregister(FailingPlot)
+
+    def call(self, *args, **kwargs):
+        stdout = StringIO()
+        call_command("warm_plot_cache", *args, stdout=stdout,
+                     stderr=StringIO(), **kwargs)
+        return stdout.getvalue()
+
+    def test_register(self):
+        path = "plottings_tests.tests.test_registry.WarmPlot"
+        self.assertIs(get_registered_plots()[path], WarmPlot)
+        with self.assertRaises(ValueError):
+            register(str)
+
+    def test_warm(self):
+        output = self.call(processes=0)
+        self.assertIn("4 rendered, 0 cached, 0 failed", output)
+        self.assertIn("WarmView(size=2): rendered", output)
+        self.assertIsNotNone(caches["default"].get(WarmPlot(2).get_cache_key()))
+        output = self.call(processes=0)
+        self.assertIn("0 rendered, 4 cached", output)
+        output = self.call(processes=0, force=True)
+        self.assertIn("4 rendered, 0 cached", output)
+
+    def test_warm_processes(self):
+        output = self.call("plottings_tests.tests.test_registry.WarmPlot",
+                           processes=2)
+        self.assertIn("Warmed 3 plots", output)
+        self.assertIn("3 rendered", output)
+        value = WarmPlot(3).get_value()
+        self.assertTrue(value.startswith("<?xml"))
+
+    def test_warm_variants_in_processes(self):
+        register(WarmSVGView)
+        self.addCleanup(unregister, WarmSVGView)
+        self.call("plottings_tests.tests.test_registry.WarmSVGView",
+                  processes=1)
+        key = build_plot(WarmSVGView, (), {}).get_cache_key()
+        base_key = key.rsplit(":", 1)[0]
+        cache = caches["default"]
+        self.assertIsNotNone(cache.get(f"{base_key}:identity"))
+        self.assertIsNotNone(cache.get(f"{base_key}:gzip"))
+
+    def test_errors(self):
+        with self.assertRaises(CommandError):
+            self.call("unknown.Plot", processes=0)
+        register(FailingPlot)
+        with self.assertRaisesRegex(CommandError, "1 failed"):
+            self.call(processes=0)
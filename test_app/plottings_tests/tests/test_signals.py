@@ -0,0 +1,101 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from plottings import CachedSVGPlotToValue, PNGBase64PlotToValue
+from plottings.metrics import MetricsSink
+from plottings.signals import plot_cache_lookup, plot_rendered
+from plottings_tests.plots import LinePlotMixin
+
+
+class Mixin(LinePlotMixin):
+    def get_plot_data(self):
+        return [1, 3, 2]
+
+
+class SignalPlot(Mixin, CachedSVGPlotToValue):
+    pass
+
+
+class SignalPNGPlot(Mixin, PNGBase64PlotToValue):
+    pass
+
+
+class RecordingSink(MetricsSink):
+    records = []
+
+    def counter(self, name, value=1, tags=None):
+        self.records.append(("counter", name, value, tags))
+
+    def histogram(self, name, value, tags=None):
+        self.records.append(("histogram", name, value, tags))
+
+
+class SignalsTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        caches["default"].clear()
+        self.events = []
+
+        def receiver(signal, sender, **kwargs):
+            self.events.append((signal, sender, kwargs))
+
+        plot_rendered.connect(receiver)
+        plot_cache_lookup.connect(receiver)
+        self.addCleanup(plot_rendered.disconnect, receiver)
+        self.addCleanup(plot_cache_lookup.disconnect, receiver)
+
+    def test_rendered(self):
+        plot = SignalPNGPlot()
+        image = plot.get_image()
+        [(signal, sender, kwargs)] = self.events
+        self.assertIs(signal, plot_rendered)
+        self.assertIs(sender, SignalPNGPlot)
+        self.assertIs(kwargs["plot"], plot)
+        self.assertEqual(kwargs["size"], len(image.getvalue()))
+        self.assertEqual(kwargs["format"], "png")
+        self.assertEqual(set(kwargs["timings"]),
+                         {"data", "plot", "save", "process"})
+        self.assertEqual(kwargs["timings"], plot.get_timings())
+
+    def test_cache_lookup(self):
+        plot = SignalPlot()
+        plot.get_image()
+        self.assertFalse(plot.cache_hit)
+        self.assertEqual([event[0] for event in self.events],
+                         [plot_cache_lookup, plot_rendered])
+        kwargs = self.events[0][2]
+        self.assertEqual(kwargs["key"], plot.get_cache_key())
+        self.assertFalse(kwargs["hit"])
+        self.assertGreaterEqual(kwargs["duration"], 0)
+        self.assertIn("cache", plot.get_timings())
+
+        plot = SignalPlot()
+        plot.get_image()
+        self.assertTrue(plot.cache_hit)
+        self.assertEqual(len(self.events), 3)
+        self.assertTrue(self.events[2][2]["hit"])
+        self.assertNotIn("plot", plot.get_timings())
+
+
+class MetricsTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        caches["default"].clear()
+        RecordingSink.records = []
+
+    def test_no_sink(self):
+        SignalPlot().get_image()
+        self.assertEqual(RecordingSink.records, [])
+
+    @override_settings(PLOTTINGS_METRICS_SINK=f"{__name__}.RecordingSink")
+    def test_sink(self):
+        SignalPlot().get_image()
+        SignalPlot().get_image()
+        names = [record[1] for record in RecordingSink.records]
+        self.assertEqual(names.count("plottings.cache.miss"), 1)
+        self.assertEqual(names.count("plottings.cache.hit"), 1)
+        self.assertEqual(names.count("plottings.render.size"), 1)
+        self.assertIn("plottings.render.plot", names)
+        self.assertNotIn("plottings.render.cache", names)
+        size = RecordingSink.records[names.index("plottings.render.size")]
+        self.assertEqual(size[3], {"plot": f"{__name__}.SignalPlot",
+                                   "format": "svg"})
@@ -1,7 +1,29 @@
+import gzip
+import time
+import asyncio
+import threading
+import tracemalloc
 from io import BytesIO
+from datetime import datetime, timezone
+from django.core.cache import caches
 from django.test import TestCase, Client
-from django.test.client import RequestFactory
-from plottings.views import BasePlotView, PNGPlotView, SVGZPlotView
+from django.test.client import RequestFactory, AsyncRequestFactory
+from django.utils.http import http_date
+import matplotlib.pyplot as plt
+from PIL import Image, features
+from plottings.views import (
+        BasePlotView,
+        PNGPlotView,
+        SVGZPlotView,
+        SVGPlotView,
+        CachedPNGPlotView,
+        CachedSVGPlotView,
+        ImagePlotView,
+        CachedImagePlotView,
+        AsyncPNGPlotView,
+        AsyncCachedPNGPlotView,
+        )
+from plottings_tests.plots import RENDERS, LinePlotMixin
 
 
 # os.environ['DJANGO_SETTINGS_MODULE'] = "test_app.settings"
@@ -42,6 +64,29 @@ class TestBlackBox(TestCase):
         content = response.content
         self.assertEqual(content, b"")
 
+    def test_svg_negotiation(self):
+        client = Client()
+        response = client.get("/activity.svg", headers={
+            "Accept-Encoding": "gzip, deflate"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        self.assertValidSVG(gzip.decompress(response.content))
+        response = client.get("/activity.svg")
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        self.assertValidSVG(response.content)
+
+    def test_image_negotiation(self):
+        client = Client()
+        response = client.get("/activity", headers={
+            "Accept": "image/webp,image/*,*/*;q=0.8"})
+        self.assertEqual(response.headers["Content-Type"], "image/webp")
+        self.assertIn("Accept", response.headers["Vary"])
+        self.assertEqual(response.content[8:12], b"WEBP")
+        response = client.get("/activity")
+        self.assertEqual(response.headers["Content-Type"], "image/png")
+        self.assertValidPNG(response.content)
+
     def assertValidSVG(self, content):
         pass
 
@@ -56,9 +101,11 @@ class ViewMixin:
     mimetype = "text/plain"
     disposition = "inline"
     output = b"texto"
+    last_modified = datetime(2024, 6, 12, tzinfo=timezone.utc)
 
     def setUp(self):
         super().setUp()
+        self.renders = 0
 
         class MockView(self.tclass):
 
@@ -71,7 +118,11 @@ class ViewMixin:
             def get_mimetype(self2):
                 return self.mimetype
 
+            def get_last_modified(self2):
+                return self.last_modified
+
             def get_image(self2):
+                self.renders += 1
                 self.buffer = self.buffer_class()
                 self.buffer.write(self.output)
                 self.buffer.seek(0)
@@ -97,6 +148,50 @@ class ViewMixin:
         self.assertEqual(response.headers["Content-Length"],
                          str(len(self.output)))
 
+    def test_etag(self):
+        request = RequestFactory().get("/" + self.filename)
+        etag = self.view(request).headers["ETag"]
+        request = RequestFactory().get("/" + self.filename,
+                                       HTTP_IF_NONE_MATCH=etag)
+        response = self.view(request)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response.headers["ETag"], etag)
+
+    def test_last_modified(self):
+        request = RequestFactory().get("/" + self.filename)
+        response = self.view(request)
+        self.assertEqual(response.headers["Last-Modified"],
+                         http_date(self.last_modified.timestamp()))
+        request = RequestFactory().get(
+                "/" + self.filename,
+                HTTP_IF_MODIFIED_SINCE=response.headers["Last-Modified"])
+        response = self.view(request)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.renders, 1)
+
+    def test_head_without_content_length(self):
+        view = self.view.view_class.as_view(head_content_length=False)
+        response = view(RequestFactory().head("/" + self.filename))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Content-Length", response.headers)
+        self.assertEqual(self.renders, 0)
+
+    def test_streaming(self):
+        view = self.view.view_class.as_view(streaming=True, chunk_size=2)
+        response = view(RequestFactory().get("/" + self.filename))
+        self.assertTrue(response.streaming)
+        chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), (len(self.output) + 1) // 2)
+        self.assertEqual(b"".join(chunks), self.output)
+        self.assertEqual(response.headers["Content-Length"],
+                         str(len(self.output)))
+
+    def test_max_age(self):
+        view = self.view.view_class.as_view(max_age=3600)
+        response = view(RequestFactory().get("/" + self.filename))
+        self.assertEqual(response.headers["Cache-Control"], "max-age=3600")
+
 
 class TextFileViewTestCase(ViewMixin, TestCase):
     filename = "text.txt"
@@ -118,3 +213,350 @@ class SVGPlotViewTestCase(ViewMixin, TestCase):
     mimetype = "image/svg+xml"
     file_format = "svgz"
     output = b"\x00\x00\x00"
+
+
+class CachedPNGPlotViewTestCase(ViewMixin, TestCase):
+    tclass = CachedPNGPlotView
+    filename = "activity.png"
+    mimetype = "image/png"
+    output = b"\x00\x00\x00"
+
+    def setUp(self):
+        super().setUp()
+        view_class = self.view.view_class
+
+        class MockCachedView(view_class):
+            def get_data_fingerprint(self2):
+                return self2.kwargs.get("key", "plot")
+
+        self.view = MockCachedView.as_view()
+
+    def test_head_from_metadata(self):
+        view_class = self.view.view_class
+
+        class MockMetadataView(view_class):
+            def get_image_metadata(self2):
+                return {"size": 1234, "created": 1700000000}
+
+            def get_last_modified(self2):
+                return None
+
+        view = MockMetadataView.as_view()
+        response = view(RequestFactory().head("/" + self.filename))
+        self.assertEqual(response.headers["Content-Length"], "1234")
+        self.assertEqual(response.headers["Last-Modified"],
+                         http_date(1700000000))
+        self.assertIn("ETag", response.headers)
+        self.assertEqual(self.renders, 0)
+
+    def test_etag_without_rendering(self):
+        request = RequestFactory().get("/" + self.filename)
+        etag = self.view(request).headers["ETag"]
+        request = RequestFactory().get("/" + self.filename,
+                                       HTTP_IF_NONE_MATCH=etag)
+        response = self.view(request)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.renders, 1)
+        response = self.view(request, key="other")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+
+class ConstantCacheKeyViewTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        caches["default"].clear()
+        self.data = [1, 2, 3]
+
+        class MockView(LinePlotMixin, CachedPNGPlotView):
+            def get_plot_data(self2):
+                return self.data
+
+            def get_cache_key(self2):
+                return "activity"
+
+        self.view = MockView.as_view()
+
+    def get(self, **headers):
+        return self.view(RequestFactory().get("/activity.png",
+                                              headers=headers))
+
+    def test_etag_follows_the_image(self):
+        etag = self.get().headers["ETag"]
+        self.assertEqual(self.get(**{"If-None-Match": etag}).status_code,
+                         304)
+        self.data = [3, 2, 1]
+        caches["default"].delete("activity")
+        response = self.get(**{"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+
+class CachedSVGPlotViewTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        caches["default"].clear()
+        RENDERS.clear()
+
+        class MockView(LinePlotMixin, CachedSVGPlotView):
+            content_codings = ["gzip", "identity"]
+
+            def get_plot_data(self2):
+                return [1, 2, 3]
+
+        self.view = MockView.as_view()
+
+    def get(self, accept_encoding=None, **headers):
+        if accept_encoding is not None:
+            headers["Accept-Encoding"] = accept_encoding
+        request = RequestFactory().get("/activity.svg", headers=headers)
+        return self.view(request)
+
+    def test_variants_from_single_render(self):
+        response = self.get("gzip")
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        document = gzip.decompress(response.content)
+        response = self.get()
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(response.content, document)
+        self.assertEqual(len(RENDERS), 1)
+
+    def test_quality_values(self):
+        response = self.get("gzip;q=0, identity")
+        self.assertNotIn("Content-Encoding", response.headers)
+        response = self.get("*;q=0.5")
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+
+    def test_not_modified_varies(self):
+        response = self.get("gzip")
+        etag = response.headers["ETag"]
+        self.assertNotEqual(self.get().headers["ETag"], etag)
+        response = self.get("gzip", **{"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+
+    def test_last_modified_from_metadata(self):
+        self.assertNotIn("Last-Modified", self.get("gzip").headers)
+        last_modified = self.get("gzip").headers["Last-Modified"]
+        request = RequestFactory().head("/activity.svg",
+                                        headers={"Accept-Encoding": "gzip"})
+        response = self.view(request)
+        self.assertEqual(response.headers["Last-Modified"], last_modified)
+        response = self.get("gzip", **{"If-Modified-Since": last_modified})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(RENDERS), 1)
+
+    def test_server_timing(self):
+        self.view.view_class.server_timing = True
+        timing = self.get("gzip").headers["Server-Timing"]
+        stages = [entry.split(";")[0] for entry in timing.split(", ")]
+        self.assertEqual(stages, ["cache", "data", "plot", "save", "process"])
+        self.assertIn('cache;desc="miss";dur=', timing)
+        timing = self.get("gzip").headers["Server-Timing"]
+        self.assertTrue(timing.startswith('cache;desc="hit";dur='))
+        self.assertNotIn("plot;", timing)
+        self.view.view_class.server_timing = False
+        self.assertNotIn("Server-Timing", self.get("gzip").headers)
+
+
+class CachedImagePlotViewTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        caches["default"].clear()
+        RENDERS.clear()
+
+        class MockView(LinePlotMixin, CachedImagePlotView):
+            image_formats = ["webp", "png"]
+
+            def get_plot_data(self2):
+                return [1, 2, 3]
+
+        self.view = MockView.as_view()
+
+    def get(self, accept=None):
+        headers = {} if accept is None else {"Accept": accept}
+        request = RequestFactory().get("/activity", headers=headers)
+        return self.view(request)
+
+    def test_variants_from_single_render(self):
+        response = self.get("image/webp,*/*;q=0.8")
+        self.assertEqual(response.headers["Content-Type"], "image/webp")
+        self.assertEqual(response.content[8:12], b"WEBP")
+        response = self.get("*/*")
+        self.assertEqual(response.headers["Content-Type"], "image/png")
+        self.assertTrue(response.content.startswith(b"\x89PNG"))
+        self.assertEqual(len(RENDERS), 1)
+
+    def test_unsupported_format(self):
+        response = self.get("image/avif,image/webp;q=0")
+        self.assertEqual(response.headers["Content-Type"], "image/png")
+
+    def test_same_pixels(self):
+        webp = Image.open(BytesIO(self.get("image/webp").content))
+        png = Image.open(BytesIO(self.get().content))
+        self.assertEqual(webp.size, png.size)
+        self.assertEqual(webp.convert("RGBA").tobytes(),
+                         png.convert("RGBA").tobytes())
+
+
+class ImagePlotViewTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        class MockView(LinePlotMixin, ImagePlotView):
+            filename = "activity.png"
+
+            def get_plot_data(self2):
+                return [1, 2, 3]
+
+        self.view = MockView.as_view()
+
+    def get(self, accept):
+        request = RequestFactory().get("/activity",
+                                       headers={"Accept": accept})
+        response = self.view(request)
+        self.assertIn("Accept", response.headers["Vary"])
+        return response
+
+    def test_negotiation(self):
+        response = self.get("image/webp,*/*;q=0.8")
+        self.assertEqual(response.headers["Content-Type"], "image/webp")
+        self.assertEqual(response.content[8:12], b"WEBP")
+        response = self.get("*/*")
+        self.assertEqual(response.headers["Content-Type"], "image/png")
+        self.assertTrue(response.content.startswith(b"\x89PNG"))
+
+    def test_avif(self):
+        response = self.get("image/avif,image/webp,*/*;q=0.8")
+        if features.check("avif"):
+            self.assertEqual(response.headers["Content-Type"], "image/avif")
+            self.assertEqual(response.content[4:12], b"ftypavif")
+        else:
+            self.assertEqual(response.headers["Content-Type"], "image/webp")
+
+
+class MemoryTestCase(TestCase):
+    size = 8 * 1024 * 1024
+
+    def setUp(self):
+        super().setUp()
+        payload = bytes(range(256)) * (self.size // 256)
+
+        class MockView(PNGPlotView):
+            def get_image(self2):
+                return BytesIO(payload)
+
+        self.view = MockView.as_view()
+
+    def measure(self, view):
+        request = RequestFactory().get("/activity.png")
+        tracemalloc.start()
+        try:
+            response = view(request)
+            for chunk in response:
+                pass
+            size, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return peak
+
+    def test_response_does_not_copy_image(self):
+        self.assertLess(self.measure(self.view), self.size / 10)
+
+    def test_streaming_does_not_copy_image(self):
+        view = self.view.view_class.as_view(streaming=True)
+        self.assertLess(self.measure(view), self.size / 10)
+
+
+class AsyncViewTestCase(TestCase):
+    tclass = AsyncCachedPNGPlotView
+
+    def setUp(self):
+        super().setUp()
+        caches["default"].clear()
+        RENDERS.clear()
+        self.loads = 0
+
+        class MockView(LinePlotMixin, self.tclass):
+            async def aget_plot_data(self2):
+                self.loads += 1
+                return [1, 2, 3]
+
+        self.view = MockView.as_view()
+
+    async def test_get(self):
+        request = AsyncRequestFactory().get("/activity.png")
+        response = await self.view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.startswith(b"\x89PNG"))
+        self.assertEqual(response.headers["Content-Length"],
+                         str(len(response.content)))
+        self.assertEqual(self.loads, 1)
+
+    async def test_cached(self):
+        request = AsyncRequestFactory().get("/activity.png")
+        response = await self.view(request)
+        content = response.content
+        response = await self.view(request)
+        self.assertEqual(response.content, content)
+        self.assertEqual(len(RENDERS), 1)
+        request = AsyncRequestFactory().get(
+                "/activity.png",
+                headers={"If-None-Match": response.headers["ETag"]})
+        response = await self.view(request)
+        self.assertEqual(response.status_code, 304)
+        request = AsyncRequestFactory().head("/activity.png")
+        response = await self.view(request)
+        self.assertEqual(response.headers["Content-Length"],
+                         str(len(content)))
+        self.assertEqual(len(RENDERS), 1)
+
+    async def test_pyplot_renders_one_at_a_time(self):
+        active = []
+        overlaps = []
+        lock = threading.Lock()
+
+        def plotter(data):
+            with lock:
+                active.append(data)
+                overlaps.append(len(active))
+            time.sleep(0.02)
+            figure, ax = plt.subplots(figsize=(1, 1))
+            ax.plot(data)
+            with lock:
+                active.remove(data)
+            return figure
+
+        class PyplotView(self.view.view_class):
+            use_pyplot = True
+            plotter_function = staticmethod(plotter)
+
+            async def aget_plot_data(self2):
+                return self2.kwargs["data"]
+
+        view = PyplotView.as_view()
+        request = AsyncRequestFactory().get("/activity.png")
+        responses = await asyncio.gather(*[view(request, data=[index, 1])
+                                           for index in range(4)])
+        self.assertTrue(all(response.status_code == 200
+                            for response in responses))
+        self.assertEqual(max(overlaps), 1)
+
+    async def test_streaming(self):
+        view = self.view.view_class.as_view(streaming=True, chunk_size=100)
+        response = await view(AsyncRequestFactory().get("/activity.png"))
+        content = b"".join([chunk async for chunk in
+                            response.streaming_content])
+        self.assertTrue(content.startswith(b"\x89PNG"))
+        self.assertEqual(response.headers["Content-Length"],
+                         str(len(content)))
+
+
+class AsyncPNGPlotViewTestCase(AsyncViewTestCase):
+    tclass = AsyncPNGPlotView
+
+    async def test_cached(self):
+        request = AsyncRequestFactory().get("/activity.png")
+        await self.view(request)
+        await self.view(request)
+        self.assertEqual(len(RENDERS), 2)
@@ -7,6 +7,8 @@ urlpatterns = [
         path("", views.main, name="main"),
         path("activity.png", views.PNGActivityPlot.as_view(), name="png"),
         path("activity.svgz", views.SVGZActivityPlot.as_view(), name="svgz"),
+        path("activity.svg", views.SVGActivityPlot.as_view(), name="svg"),
+        path("activity", views.ImageActivityPlot.as_view(), name="image"),
         path("new_png", views.new_png, name="new_png"),
         path("new_svg", views.new_svg, name="new_svg"),
     ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -6,12 +6,14 @@ from plottings import (
         PNGPlotToFile,
         PNGPlotView,
         SVGZPlotView,
+        SVGPlotView,
+        ImagePlotView,
         SVGPlotToValue,
         PNGBase64PlotToValue,
         )
 from django.http import HttpResponseRedirect
 from django.urls import reverse
-from .plots import activity_plot
+from .plots import activity_figure, activity_plot
 from .data import ActivityMap
 from .models import Plot
 
@@ -59,6 +61,15 @@ class SVGZActivityPlot(ActivityPlotMixin, SVGZPlotView):
     plotter_function = staticmethod(activity_plot)
 
 
+class SVGActivityPlot(ActivityPlotMixin, SVGPlotView):
+    plotter_function = staticmethod(activity_plot)
+
+
+class ImageActivityPlot(ActivityPlotMixin, ImagePlotView):
+    use_pyplot = False
+    plotter_function = staticmethod(activity_figure)
+
+
 def main(request):
     plots = Plot.objects.all()
     context = {"svg_data": SVGPlot(),
@@ -18,4 +18,5 @@ from django.urls import path, include
 
 urlpatterns = [
     path("", include("plottings_tests.urls")),
+    path("plots/", include("plottings.urls")),
 ]